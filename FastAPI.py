@@ -1,5 +1,7 @@
+# -*- coding: cp1254 -*-
 
 import asyncio
+import os
 from enum import IntEnum
 from typing import Annotated
 import logging
@@ -12,9 +14,10 @@ from fastapi import (
     Security,
     Depends,
     HTTPException,
-    BackgroundTasks,
+    Header,
     status,
-    Request
+    Request,
+    Response
 )
 from fastapi.security import APIKeyHeader
 from pydantic import BaseModel, Field
@@ -22,15 +25,30 @@ from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 
+import rate_limit_storage
+from book_store import BookStore, VersionConflict
+from concurrency import BackendCall, CircuitOpenError
+from metrics import MetricsMiddleware, MetricsRegistry, instrument_backend
+from notifications import NotificationSink
+from response_cache import ResponseCache, etag_matches
+
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-limiter = Limiter(key_func=get_remote_address)
+RATE_LIMIT_STORAGE = os.getenv("RATE_LIMIT_STORAGE", "sqlite:///ratelimits.db")
+
+limiter = Limiter(key_func=get_remote_address, storage_uri=RATE_LIMIT_STORAGE)
+
 
+NOTIFICATION_LOG = os.getenv("NOTIFICATION_LOG", "log.txt")
 
-books_db = []
+books_db = BookStore()
+notifications = NotificationSink(NOTIFICATION_LOG)
+list_cache = ResponseCache()
+metrics = MetricsRegistry()
+metrics.gauge("library_books", "Katalogdaki kitap says").set_function(lambda: len(books_db))
 book_id_counter = 1
 
 @asynccontextmanager
@@ -46,14 +64,19 @@ async def lifespan(app: FastAPI):
         {"id": 3, "title": "Dune", "author": "Frank Herbert", "publication_year": 1965}
     ]
 
-    books_db.extend(sample_books)
+    books_db.clear()
+    for sample_book in sample_books:
+        books_db.add(sample_book)
     global book_id_counter
     book_id_counter = 4
 
     logger.info(f"yuklendi {len(sample_books)} ")
+    notifications.start()
 
     yield  
 
+    await notifications.stop()
+
     
     logger.info("FastAPI kapatidi")
 
@@ -68,6 +91,7 @@ app = FastAPI(
 
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+app.add_middleware(MetricsMiddleware, registry=metrics)
 
 class Book(BaseModel):
     
@@ -118,15 +142,13 @@ async def slow_db_call():
     
     await asyncio.sleep(1)  
     return {"status": "done"}
-def write_notification(email: str, message=""):
-   
-    try:
-        with open("log.txt", mode="a") as email_file:
-            content = f"bildirim {email}: {message}\n"
-            email_file.write(content)
-        logger.info(f"bildirim yazld {email}")
-    except Exception as e:
-        logger.error(f"baarz bildirim: {e}")
+
+slow_backend = BackendCall(slow_db_call, name="slow_db", timeout=2, concurrency=10, cache_ttl=5)
+instrument_backend(metrics, slow_backend)
+def book_etag(book_id: int, version: int) -> str:
+    
+    return f'"{book_id}-{version}"'
+
 
 @app.get("/")
 async def root():
@@ -138,17 +160,34 @@ async def health_check():
    
     return {"status": "healthy", "timestamp": "2025-07-30"}
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    
+    return metrics.response()
+
 
 @app.get("/slow-endpoint")
 async def handle_slow_request():
     
     logger.info("stek alnd.")
-    result = await slow_db_call()
+    try:
+        result = await slow_backend()
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(max(int(e.retry_after), 1))}
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="arka u zamannda yant vermedi"
+        )
     logger.info("Yava ilem tamamland")
     return result
 
 @app.post("/books/", response_model=BookResponse, status_code=status.HTTP_201_CREATED)
-async def create_book(book: BookCreate):
+async def create_book(book: BookCreate, response: Response):
     
     global book_id_counter
 
@@ -159,8 +198,9 @@ async def create_book(book: BookCreate):
         publication_year=book.publication_year
     )
 
-    books_db.append(new_book.model_dump())
+    books_db.add(new_book.model_dump())
     book_id_counter += 1
+    response.headers["ETag"] = book_etag(new_book.id, books_db.version(new_book.id))
 
     logger.info(f"yeni kitap: {new_book.title}")
     return new_book
@@ -171,57 +211,80 @@ async def list_books(
     limit: Annotated[int, Query(description="kitap says", ge=1, le=100)] = 10
 ):
     
-    return books_db[skip:skip + limit]
+    return books_db.slice(skip, limit)
 
 @app.get("/books/{book_id}", response_model=BookResponse)
 async def get_book(
-    book_id: Annotated[int, Path(title="Book ID", ge=1)]
+    book_id: Annotated[int, Path(title="Book ID", ge=1)],
+    response: Response,
+    if_none_match: Annotated[str | None, Header()] = None
 ):
     
-    for book in books_db:
-        if book["id"] == book_id:
-            return book
+    book = books_db.get(book_id)
+    if book is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"bu d ile  {book_id} yok"
+        )
 
-    raise HTTPException(
-        status_code=status.HTTP_404_NOT_FOUND,
-        detail=f"bu d ile  {book_id} yok"
-    )
+    etag = book_etag(book_id, books_db.version(book_id))
+    if etag_matches(if_none_match, etag, weak=True):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return book
 
 @app.put("/books/{book_id}", response_model=BookResponse)
 async def update_book(
     book_id: Annotated[int, Path(title="Kitap ID'si", ge=1)],
     book: Book,
-    version: Annotated[int | None, Query(title="versiyon no", ge=1)] = None
+    response: Response,
+    version: Annotated[int | None, Query(title="versiyon no", ge=1)] = None,
+    if_match: Annotated[str | None, Header()] = None
 ):
     
-    for i, existing_book in enumerate(books_db):
-        if existing_book["id"] == book_id:
-            updated_book = {
-                "id": book_id,
-                "title": book.title,
-                "author": book.author,
-                "publication_year": book.publication_year
-            }
-            books_db[i] = updated_book
-
-            logger.info(f"Updated book {book_id}, version: {version}")
-            return updated_book
+    current_version = books_db.version(book_id)
+    if current_version is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"{book_id} bulunmuyoki"
+        )
 
-    raise HTTPException(
-        status_code=status.HTTP_404_NOT_FOUND,
-        detail=f"{book_id} bulunmuyoki"
-    )
+    current_etag = book_etag(book_id, current_version)
+    if if_match is not None and not etag_matches(if_match, current_etag):
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=f"{book_id} id'li kitap deimi",
+            headers={"ETag": current_etag}
+        )
+
+    updated_book = {
+        "id": book_id,
+        "title": book.title,
+        "author": book.author,
+        "publication_year": book.publication_year
+    }
+    try:
+        new_version = books_db.replace(book_id, updated_book, expected_version=version)
+    except VersionConflict as e:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=str(e),
+            headers={"ETag": book_etag(book_id, e.version)}
+        )
+
+    logger.info(f"Updated book {book_id}, version: {new_version}")
+    response.headers["ETag"] = book_etag(book_id, new_version)
+    return updated_book
 
 @app.delete("/books/{book_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_book(
     book_id: Annotated[int, Path(title="Book ID", ge=1)]
 ):
     
-    for i, book in enumerate(books_db):
-        if book["id"] == book_id:
-            deleted_book = books_db.pop(i)
-            logger.info(f"silinen kitap: {deleted_book['title']}")
-            return
+    deleted_book = books_db.remove(book_id)
+    if deleted_book is not None:
+        logger.info(f"silinen kitap: {deleted_book['title']}")
+        return
 
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
@@ -235,19 +298,18 @@ async def secure_endpoint(api_key: str = Depends(get_api_key)):
     return {"message":" API anahtari geerlidi"}
 
 @app.get("/secure/books", response_model=list[BookResponse])
-async def secure_list_books(api_key: str = Depends(get_api_key)):
+async def secure_list_books(request: Request, api_key: str = Depends(get_api_key)):
     
-    return books_db
+    return list_cache.respond(request, "books", books_db.generation, lambda: list(books_db))
 
 @app.post("/send-notification/{email}")
 async def send_notification(
     email: str,
-    background_tasks: BackgroundTasks,
     message: str = "kitap bildiimi"
 ):
     
 
-    background_tasks.add_task(write_notification, email, message=message)
+    await notifications.submit(email, message=message)
     return {"message": "bildirim yazildi"}
 
 
@@ -270,23 +332,23 @@ async def rate_limited_books(request: Request):
     return {
         "message": "enpoint rate i ",
         "total_books": len(books_db),
-        "books": books_db[:5]  
+        "books": books_db.slice(0, 5)  
     }
 
 
 @app.get("/api/v1/books", response_model=list[BookResponse])
-async def list_books_v1():
+async def list_books_v1(request: Request):
     
-    return books_db
+    return list_cache.respond(request, "books", books_db.generation, lambda: list(books_db))
 
 @app.get("/api/v2/books")
-async def list_books_v2():
+async def list_books_v2(request: Request):
     
-    return {
+    return list_cache.respond(request, "books-v2", books_db.generation, lambda: {
         "version": "2.0",
         "total_books": len(books_db),
-        "books": books_db
-    }
+        "books": list(books_db)
+    })
 
 
 @app.get("/error-demo")
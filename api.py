@@ -1,12 +1,33 @@
-﻿from fastapi import FastAPI, HTTPException, status
+﻿from fastapi import FastAPI, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional
+import asyncio
+import importlib.util
+from collections import Counter, OrderedDict
+from functools import partial
+from typing import AsyncIterator, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Set, Tuple
+import heapq
 import httpx
+import itertools
 import json
 import os
-from contextlib import asynccontextmanager
+import re
+import sqlite3
+import sys
+import threading
+from contextlib import asynccontextmanager, contextmanager, nullcontext
 import logging
 
+from concurrency import BackendCall, CircuitOpenError, KeyedLock, SingleFlight
+from metadata_cache import MetadataCache
+from metrics import MetricsMiddleware, MetricsRegistry, instrument_backend, timing_observer
+from persistence import PersistenceWorker
+from response_cache import ResponseCache, json_response
+from search import SearchIndex, fold, tokenize
+from sorted_keys import SortedKeys
+from storage import (CORRUPT_SNAPSHOT_ERRORS, INDEX_KEY_SIZE, FileLock, Journal, SnapshotIndex, build_index,
+                     quarantine, read_snapshot, remove_quietly, write_binary_snapshot, write_snapshot)
+
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -29,12 +50,41 @@ class ErrorResponse(BaseModel):
     detail: str
 
 
+class UpstreamError(ValueError):
+    
+    def __init__(self, status_code: int):
+        super().__init__(f"API hatasi: {status_code}")
+        self.status_code = status_code
+
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+OPENLIBRARY_TIMEOUT = float(os.getenv("OPENLIBRARY_TIMEOUT", "10"))
+OPENLIBRARY_CONCURRENCY = int(os.getenv("OPENLIBRARY_CONCURRENCY", "20"))
+
+
+def upstream_error_message(e: Exception) -> str:
+    
+    if isinstance(e, ValueError):
+        return str(e)
+    if isinstance(e, CircuitOpenError):
+        return f"OpenLibrary API'si yanıt vermiyor, {e.retry_after:.0f} sn sonra tekrar deneyin."
+    if isinstance(e, (httpx.TimeoutException, asyncio.TimeoutError)):
+        return "API isteki zaman aşımı uğradi."
+    if isinstance(e, httpx.RequestError):
+        return f"İnternet bağlantı hatası: {e}"
+    if isinstance(e, httpx.HTTPStatusError):
+        return f"API hatasi: {e.response.status_code}"
+    return f"beklenmeyen hata: {e}"
+
+
 class Book:
     
     
+    __slots__ = ("title", "author", "isbn")
+    
     def __init__(self, title: str, author: str, isbn: str):
         self.title = title
-        self.author = author
+        self.author = sys.intern(author)
         self.isbn = isbn
     
     def __str__(self) -> str:
@@ -55,118 +105,987 @@ class Book:
         return cls(data["title"], data["author"], data["isbn"])
 
 
+SNAPSHOT_FORMATS = ("json", "binary")
+GENERATIONS = itertools.count(1)
+
+SnapshotStat = Tuple[int, int, int]
+LibraryState = Tuple[Dict[str, Book], SortedKeys, Dict[str, int]]
+SharedChanges = Tuple[Optional[SnapshotStat], Optional[List[dict]], Optional[LibraryState]]
+
+
 class Library:
     
-    def __init__(self, filename: str = "library.json"):
+    def __init__(self, filename: str = "library.json", journal: bool = False,
+                 compact_every: int = 1000, fsync_every: int = 1,
+                 cache: Optional[MetadataCache] = None, snapshot_format: str = "json",
+                 shared: bool = False):
+        if snapshot_format not in SNAPSHOT_FORMATS:
+            raise ValueError(f"bilinmeyen snapshot formatı: {snapshot_format}")
         self.filename = filename
-        self.books: List[Book] = []
-        self.load_books()
+        self.snapshot_format = snapshot_format
+        self.cache = cache
+        self.http_client: Optional[httpx.AsyncClient] = None
+        self._inflight = SingleFlight()
+        self.upstream = BackendCall(self._download_json, name="OpenLibrary", timeout=OPENLIBRARY_TIMEOUT,
+                                    concurrency=OPENLIBRARY_CONCURRENCY,
+                                    is_failure=lambda result: result[0] >= 500)
+        self._isbn_locks = KeyedLock()
+        self.author_concurrency = 4
+        self.shared = shared
+        self._file_lock = FileLock(filename + ".lock") if shared else None
+        self._shared_lock = asyncio.Lock()
+        self._snapshot_stat: Optional[SnapshotStat] = None
+        self._lock_depth = 0
+        self._deferring = False
+        self._generation = next(GENERATIONS)
+        self.journal = Journal(filename + ".journal", fsync_every) if journal else None
+        self.compact_every = compact_every
+        self.persistence: Optional[PersistenceWorker] = None
+        self._pending: List[dict] = []
+        self._books: Dict[str, Book] = {}
+        self._sorted_isbns = SortedKeys()
+        self._author_counts: Dict[str, int] = {}
+        self._search: Optional[SearchIndex] = None
+        with self._file_lock.shared() if self._file_lock is not None else nullcontext():
+            self.load_books()
+            self._snapshot_stat = self._stat_snapshot()
+    
+    @property
+    def books(self) -> List[Book]:
+        
+        return list(self._books.values())
+    
+    @property
+    def generation(self) -> Hashable:
+        
+        return self._generation
+    
+    def __len__(self) -> int:
+        
+        return len(self._books)
+    
+    def __contains__(self, isbn: str) -> bool:
+        
+        return isbn in self._books
     
     def add_book(self, book: Book) -> None:
         
-        if self.find_book(book.isbn):
-            raise ValueError(f"ISBN {book.isbn} zaten var")
+        with self._locked():
+            if book.isbn in self:
+                raise ValueError(f"ISBN {book.isbn} zaten var")
+            
+            self._insert(book)
+            self._record({"op": "add", "book": book.to_dict()})
+    
+    def add_books(self, books: Iterable[Book]) -> List[Book]:
         
-        self.books.append(book)
-        self.save_books()
+        added = []
+        with self._locked():
+            for book in books:
+                if book.isbn not in self:
+                    self._insert(book)
+                    added.append(book)
+            if added:
+                self._record_many([{"op": "add", "book": book.to_dict()} for book in added])
+        return added
+    
+    def _insert(self, book: Book) -> None:
+        
+        self._generation = next(GENERATIONS)
+        self._books[book.isbn] = book
+        self._sorted_isbns.add(book.isbn)
+        self._count_author(book.author, 1)
+        if self._search is not None:
+            self._search.add(book.isbn, f"{book.title} {book.author}")
     
     def remove_book(self, isbn: str) -> bool:
         
-        for i, book in enumerate(self.books):
-            if book.isbn == isbn:
-                self.books.pop(i)
-                self.save_books()
-                return True
-        return False
+        with self._locked():
+            if self._delete(isbn) is None:
+                return False
+            self._record({"op": "remove", "isbn": isbn})
+            return True
+    
+    def _delete(self, isbn: str) -> Optional[Book]:
+        
+        book = self._books.pop(isbn, None)
+        if book is None:
+            return None
+        self._generation = next(GENERATIONS)
+        self._sorted_isbns.remove(isbn)
+        self._count_author(book.author, -1)
+        if self._search is not None:
+            self._search.remove(isbn)
+        return book
+    
+    def refresh(self) -> None:
+        
+        if self.shared:
+            with self._locked(exclusive=False):
+                pass
+    
+    async def refreshed(self) -> None:
+        
+        if self.shared:
+            async with self.locked(exclusive=False):
+                pass
+    
+    @asynccontextmanager
+    async def locked(self, exclusive: bool = True) -> AsyncIterator[None]:
+        
+        if self._file_lock is None:
+            yield
+            return
+        
+        async with self._shared_lock:
+            await asyncio.to_thread(self._file_lock.acquire, not exclusive)
+            try:
+                self._apply_changes(await asyncio.to_thread(self._read_changes))
+                self._lock_depth += 1
+                self._deferring = exclusive
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                    self._deferring = False
+                    if exclusive:
+                        await self._write_deferred()
+                        self._snapshot_stat = self._stat_snapshot()
+            finally:
+                self._file_lock.release()
+    
+    async def _write_deferred(self) -> None:
+        
+        job = self.prepare_flush()
+        if job is not None:
+            finish = await asyncio.to_thread(job)
+            if finish is not None:
+                finish()
+    
+    @contextmanager
+    def _locked(self, exclusive: bool = True) -> Iterator[None]:
+        
+        if self._file_lock is None or self._lock_depth:
+            yield
+            return
+        
+        with self._file_lock.exclusive() if exclusive else self._file_lock.shared():
+            self._lock_depth += 1
+            try:
+                self._catch_up()
+                yield
+            finally:
+                self._lock_depth -= 1
+                if exclusive:
+                    self._snapshot_stat = self._stat_snapshot()
+    
+    def _catch_up(self) -> None:
+        
+        self._apply_changes(self._read_changes())
+    
+    def _read_changes(self) -> SharedChanges:
+        
+        stat = self._stat_snapshot()
+        if stat == self._snapshot_stat:
+            entries = self.journal.tail() if self.journal is not None else []
+            if entries is not None:
+                return stat, entries, None
+        return stat, None, self._read_state()
+    
+    def _apply_changes(self, changes: SharedChanges) -> None:
+        
+        stat, entries, state = changes
+        self._snapshot_stat = stat
+        if entries is None:
+            self._use_state(state)
+            return
+        for entry in entries:
+            if entry.get("op") == "add":
+                book = Book.from_dict(entry["book"])
+                if book.isbn not in self:
+                    self._insert(book)
+            elif entry.get("op") == "remove":
+                self._delete(entry["isbn"])
+    
+    def _stat_snapshot(self) -> Optional[SnapshotStat]:
+        
+        try:
+            stat = os.stat(self.filename)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
     
     def list_books(self) -> List[Book]:
         
-        return self.books.copy()
+        return list(self._books.values())
     
     def find_book(self, isbn: str) -> Optional[Book]:
         
-        for book in self.books:
-            if book.isbn == isbn:
-                return book
-        return None
+        return self._books.get(isbn)
+    
+    def search_books(self, query: str, limit: int = 20) -> List[Book]:
+        
+        return [self._books[isbn] for isbn in self._ensure_search().search(query, limit)]
+    
+    def _ensure_search(self) -> SearchIndex:
+        
+        if self._search is None:
+            self._search = SearchIndex()
+            self._search.build((book.isbn, f"{book.title} {book.author}") for book in self._books.values())
+        return self._search
+    
+    def page_books(self, cursor: Optional[str] = None, limit: int = 100) -> List[Book]:
+        
+        return [self._books[isbn] for isbn in itertools.islice(self._sorted_isbns.after(cursor or None), limit)]
+    
+    def author_counts(self) -> Dict[str, int]:
+        
+        return dict(self._author_counts)
+    
+    def _count_author(self, author: str, delta: int) -> None:
+        
+        count = self._author_counts.get(author, 0) + delta
+        if count > 0:
+            self._author_counts[author] = count
+        else:
+            self._author_counts.pop(author, None)
+    
+    def iter_books(self, batch_size: int = 1000) -> Iterator[Book]:
+        
+        cursor = None
+        while True:
+            page = self.page_books(cursor, batch_size)
+            yield from page
+            if len(page) < batch_size:
+                return
+            cursor = page[-1].isbn
     
     def load_books(self) -> None:
         
+        self._use_state(self._read_state())
+    
+    def _read_state(self) -> Optional[LibraryState]:
+        
+        books = self._read_snapshot()
+        if self.journal is not None:
+            for entry in self.journal.replay():
+                if entry.get("op") == "add":
+                    book = Book.from_dict(entry["book"])
+                    books[book.isbn] = book
+                elif entry.get("op") == "remove":
+                    books.pop(entry["isbn"], None)
+        return books, SortedKeys(books), dict(Counter(book.author for book in books.values()))
+    
+    def _use_state(self, state: Optional[LibraryState]) -> None:
+        
+        self._generation = next(GENERATIONS)
+        self._books, self._sorted_isbns, self._author_counts = state
+        self._search = None
+    
+    def _read_snapshot(self) -> Dict[str, Book]:
+        
         try:
-            with open(self.filename, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-                self.books = [Book.from_dict(book_data) for book_data in data]
+            return {isbn: Book(title, author, isbn) for title, author, isbn in read_snapshot(self.filename)}
         except FileNotFoundError:
             logger.info(f"{self.filename} bulunamadi Yeni dosya oluşturalim.")
-            self.books = []
-        except json.JSONDecodeError:
-            logger.warning(f"{self.filename} geçersiz JSON formatında Yeni dosya oluşturulim")
-            self.books = []
-        except Exception as e:
-            logger.error(f"Dosya yüklenirken hata: {e}")
-            self.books = []
+            return {}
+        except CORRUPT_SNAPSHOT_ERRORS as e:
+            backup = quarantine(self.filename)
+            logger.error(f"{self.filename} yüklenemedi ({e}), {backup} olarak saklandi Yeni dosya oluşturulim")
+            return {}
     
     def save_books(self) -> None:
         
+        self._write_books(list(self._books.values()))
+    
+    def _write_books(self, books: List[Book]) -> None:
+        
         try:
-            with open(self.filename, 'w', encoding='utf-8') as file:
-                books_data = [book.to_dict() for book in self.books]
-                json.dump(books_data, file, ensure_ascii=False, indent=2)
+            if self.snapshot_format == "binary":
+                records = [(book.title, book.author, book.isbn) for book in books]
+                write_binary_snapshot(self.filename, records)
+            else:
+                books_data = [book.to_dict() for book in books]
+                write_snapshot(self.filename, books_data)
         except Exception as e:
             logger.error(f"Dosya kaydedilirkenki hatası {e}")
             raise
-
+    
+    def compact(self) -> None:
+        
+        with self._locked():
+            self.save_books()
+            if self.journal is not None:
+                self.journal.truncate()
+    
+    def close(self) -> None:
+        
+        if self.journal is not None:
+            self.journal.close()
+        if self._file_lock is not None:
+            self._file_lock.close()
+    
+    def _record(self, entry: dict) -> None:
+        
+        self._record_many([entry])
+    
+    def _record_many(self, entries: List[dict]) -> None:
+        
+        if self._deferring:
+            self._pending.extend(entries)
+            return
+        
+        if self.persistence is not None:
+            self._pending.extend(entries)
+            self.persistence.notify(len(entries))
+            return
+        
+        if self.journal is None:
+            self.save_books()
+            return
+        
+        self.journal.append_many(entries)
+        if self.journal.entries >= self.compact_every:
+            self.compact()
+    
+    def prepare_flush(self) -> Optional[Callable[[], Optional[Callable[[], None]]]]:
+        
+        if not self._pending:
+            return None
+        entries, self._pending = self._pending, []
+        
+        def restore() -> None:
+            self._pending[:0] = entries
+        
+        journal = self.journal
+        try:
+            if journal is None or journal.entries + len(entries) >= self.compact_every:
+                write = self._snapshot_job()
+            else:
+                write = None
+        except BaseException:
+            restore()
+            raise
+        
+        def job() -> Optional[Callable[[], None]]:
+            try:
+                if journal is not None:
+                    journal.append_many(entries)
+                else:
+                    return write()
+            except BaseException:
+                restore()
+                raise
+            if write is None:
+                return None
+            finish = write()
+            journal.truncate()
+            return finish
+        return job
+    
+    def _snapshot_job(self) -> Callable[[], Optional[Callable[[], None]]]:
+        
+        return partial(self._write_books, list(self._books.values()))
+    
+    async def persisted(self) -> None:
+        
+        if self.persistence is not None:
+            await self.persistence.commit()
+    
     async def add_book_by_isbn(self, isbn: str) -> Book:
         
         try:
-            
-            url = f"https://openlibrary.org/isbn/{isbn}.json"
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, timeout=10)
-                
-                if response.status_code == 404:
-                    raise ValueError("Kitap yok api'de böyle bir ISBN yok.")
-                
-                response.raise_for_status()
-                data = response.json()
-                
-               
-                title = data.get('title', 'Bilinmeyen Başlık')
-                
-               
-                authors = []
-                if 'authors' in data:
-                    for author_data in data['authors']:
-                        if 'key' in author_data:
-                            
-                            author_key = author_data['key']
-                            author_url = f"https://openlibrary.org{author_key}.json"
-                            author_response = await client.get(author_url, timeout=10)
-                            if author_response.status_code == 200:
-                                author_info = author_response.json()
-                                author_name = author_info.get('name', 'Bilinmeyen Yazar')
-                                authors.append(author_name)
+            async with self._isbn_locks.hold(isbn):
+                if isbn in self:
+                    raise ValueError(f"ISBN {isbn} zaten var")
+                if self.http_client is not None:
+                    book = await self._resolve_book(self.http_client, isbn)
+                else:
+                    async with httpx.AsyncClient() as client:
+                        book = await self._resolve_book(client, isbn)
                 
-                author = ', '.join(authors) if authors else 'Bilinmeyen Yazar'
+                async with self.locked():
+                    self.add_book(book)
                 
-                
-                book = Book(title, author, isbn)
-                self.add_book(book)
-                return book
-                
-        except httpx.TimeoutException:
-            raise ValueError("API isteki zaman aşımı uğradi.")
-        except httpx.RequestError as e:
-            raise ValueError(f"İnternet bağlantı hatası: {e}")
-        except httpx.HTTPStatusError as e:
-            raise ValueError(f"API hatasi: {e.response.status_code}")
-        except ValueError:
+        except (ValueError, CircuitOpenError, httpx.TimeoutException, asyncio.TimeoutError):
             raise  
         except Exception as e:
-            raise ValueError(f"beklenmeyen hata: {e}")
+            raise ValueError(upstream_error_message(e))
+        
+        await self.persisted()
+        return book
+    
+    async def import_isbns(self, isbns: List[str], concurrency: int = 8, retries: int = 2,
+                           backoff: float = 0.5) -> AsyncIterator[dict]:
+        
+        isbns = list(dict.fromkeys(isbns))
+        semaphore = asyncio.Semaphore(concurrency)
+        resolved: List[Book] = []
+        summary = {"requested": len(isbns), "added": 0, "exists": 0, "failed": 0}
+        
+        async def resolve(client: httpx.AsyncClient, isbn: str) -> dict:
+            if isbn in self:
+                return {"isbn": isbn, "status": "exists"}
+            async with semaphore:
+                try:
+                    book = await self._resolve_with_retry(client, isbn, retries, backoff)
+                except Exception as e:
+                    return {"isbn": isbn, "status": "error", "detail": upstream_error_message(e)}
+            resolved.append(book)
+            return {"isbn": isbn, "status": "ok", "book": book.to_dict()}
+        
+        client = self.http_client or httpx.AsyncClient()
+        tasks = [asyncio.ensure_future(resolve(client, isbn)) for isbn in isbns]
+        try:
+            for task in asyncio.as_completed(tasks):
+                result = await task
+                if result["status"] == "exists":
+                    summary["exists"] += 1
+                elif result["status"] == "error":
+                    summary["failed"] += 1
+                yield result
+        finally:
+            for task in tasks:
+                task.cancel()
+            async with self.locked():
+                added = self.add_books(resolved)
+            if client is not self.http_client:
+                await client.aclose()
+        
+        await self.persisted()
+        summary["added"] = len(added)
+        summary["exists"] += len(resolved) - len(added)
+        yield {"summary": summary}
+    
+    async def _resolve_with_retry(self, client: httpx.AsyncClient, isbn: str,
+                                  retries: int, backoff: float) -> Book:
+        
+        for attempt in range(retries + 1):
+            try:
+                return await self._resolve_book(client, isbn)
+            except (httpx.TransportError, asyncio.TimeoutError, UpstreamError) as e:
+                retryable = not isinstance(e, UpstreamError) or e.status_code in RETRYABLE_STATUSES
+                if not retryable or attempt == retries:
+                    raise
+                await asyncio.sleep(backoff * 2 ** attempt)
+    
+    async def _resolve_book(self, client: httpx.AsyncClient, isbn: str) -> Book:
+        
+        url = f"https://openlibrary.org/isbn/{isbn}.json"
+        status_code, data = await self._fetch_json(client, url)
+        
+        if status_code == 404:
+            raise ValueError("Kitap yok api'de böyle bir ISBN yok.")
+        if status_code != 200:
+            raise UpstreamError(status_code)
+        
+        title = data.get('title', 'Bilinmeyen Başlık')
+        
+        author_keys = [author_data['key'] for author_data in data.get('authors', []) if 'key' in author_data]
+        semaphore = asyncio.Semaphore(self.author_concurrency)
+        names = await asyncio.gather(*(self._fetch_author(client, key, semaphore) for key in author_keys))
+        authors = [name for name in names if name]
+        
+        author = ', '.join(authors) if authors else 'Bilinmeyen Yazar'
+        return Book(title, author, isbn)
+    
+    async def _fetch_author(self, client: httpx.AsyncClient, author_key: str,
+                            semaphore: asyncio.Semaphore) -> Optional[str]:
+        
+        author_url = f"https://openlibrary.org{author_key}.json"
+        async with semaphore:
+            author_status, author_info = await self._fetch_json(client, author_url)
+        if author_status == 200:
+            return author_info.get('name', 'Bilinmeyen Yazar')
+        return None
+    
+    async def _fetch_json(self, client: httpx.AsyncClient, url: str) -> Tuple[int, Optional[dict]]:
+        
+        if self.cache is not None:
+            cached = self.cache.get(url)
+            if cached is not None:
+                return cached
+        
+        return await self._inflight.do(url, lambda: self.upstream(client, url))
+    
+    async def _download_json(self, client: httpx.AsyncClient, url: str) -> Tuple[int, Optional[dict]]:
+        
+        response = await client.get(url, timeout=10)
+        data = response.json() if response.status_code == 200 else None
+        if self.cache is not None:
+            self.cache.set(url, response.status_code, data)
+        return response.status_code, data
 
 
+class LazyLibrary(Library):
+    
+    def __init__(self, filename: str = "library.json", journal: bool = False,
+                 compact_every: int = 1000, fsync_every: int = 1,
+                 cache: Optional[MetadataCache] = None, shared: bool = False, cache_size: int = 10000):
+        self.index_filename = filename + ".idx"
+        self.cache_size = cache_size
+        self._snapshot: Optional[SnapshotIndex] = None
+        self._cache: "OrderedDict[str, Book]" = OrderedDict()
+        self._removed: Set[str] = set()
+        self._counted = False
+        super().__init__(filename, journal=journal, compact_every=compact_every,
+                         fsync_every=fsync_every, cache=cache, shared=shared)
+    
+    @property
+    def books(self) -> List[Book]:
+        
+        return self.list_books()
+    
+    def __len__(self) -> int:
+        
+        snapshot_count = len(self._snapshot) if self._snapshot is not None else 0
+        return snapshot_count - len(self._removed) + len(self._books)
+    
+    def __contains__(self, isbn: str) -> bool:
+        
+        return isbn in self._books or self._snapshot_position(isbn) is not None
+    
+    def _insert(self, book: Book) -> None:
+        
+        if len(book.isbn.encode('utf-8')) > INDEX_KEY_SIZE:
+            raise ValueError(f"ISBN {book.isbn} çok uzun")
+        self._generation = next(GENERATIONS)
+        self._books[book.isbn] = book
+        self._sorted_isbns.add(book.isbn)
+        if self._counted:
+            self._count_author(book.author, 1)
+        if self._search is not None:
+            self._search.add(book.isbn, f"{book.title} {book.author}")
+    
+    def _delete(self, isbn: str) -> Optional[Book]:
+        
+        book = self._discard(isbn)
+        if book is not None:
+            self._generation = next(GENERATIONS)
+        if book is not None and self._counted:
+            self._count_author(book.author, -1)
+        if book is not None and self._search is not None:
+            self._search.remove(isbn)
+        return book
+    
+    def _discard(self, isbn: str) -> Optional[Book]:
+        
+        book = self._books.pop(isbn, None)
+        if book is not None:
+            self._sorted_isbns.remove(isbn)
+            return book
+        
+        book = self._snapshot_book(isbn)
+        if book is not None:
+            self._removed.add(isbn)
+            self._cache.pop(isbn, None)
+        return book
+    
+    def list_books(self) -> List[Book]:
+        
+        return list(self.iter_books())
+    
+    def find_book(self, isbn: str) -> Optional[Book]:
+        
+        book = self._books.get(isbn)
+        return book if book is not None else self._snapshot_book(isbn)
+    
+    def search_books(self, query: str, limit: int = 20) -> List[Book]:
+        
+        return [self.find_book(isbn) for isbn in self._ensure_search().search(query, limit)]
+    
+    def page_books(self, cursor: Optional[str] = None, limit: int = 100) -> List[Book]:
+        
+        snapshot = self._snapshot
+        position, count = 0, len(snapshot) if snapshot is not None else 0
+        if cursor and snapshot is not None:
+            position = snapshot.bisect_right(cursor)
+        added = self._sorted_isbns.after(cursor or None)
+        next_added = next(added, None)
+        
+        page: List[Book] = []
+        while len(page) < limit:
+            key = snapshot.key(position) if position < count else None
+            if key is not None and key in self._removed:
+                position += 1
+                continue
+            if next_added is not None and (key is None or next_added < key):
+                page.append(self._books[next_added])
+                next_added = next(added, None)
+            elif key is not None:
+                book = self._cache.get(key)
+                page.append(book if book is not None else Book.from_dict(snapshot.read(position)))
+                position += 1
+            else:
+                break
+        return page
+    
+    def author_counts(self) -> Dict[str, int]:
+        
+        if not self._counted:
+            authors = [data["author"] for data in self._snapshot_records()]
+            authors.extend(book.author for book in self._books.values())
+            self._author_counts = dict(Counter(map(sys.intern, authors)))
+            self._counted = True
+        return dict(self._author_counts)
+    
+    def load_books(self) -> None:
+        
+        self._generation = next(GENERATIONS)
+        self._close_snapshot()
+        self._books, self._sorted_isbns, self._cache, self._removed = {}, SortedKeys(), OrderedDict(), set()
+        self._author_counts, self._counted, self._search = {}, False, None
+        self._open_snapshot()
+        if self.journal is not None:
+            for entry in self.journal.replay():
+                self._apply(entry)
+    
+    def _read_state(self) -> None:
+        
+        return None
+    
+    def _use_state(self, state: None) -> None:
+        
+        self.load_books()
+    
+    def _open_snapshot(self) -> None:
+        
+        if not os.path.exists(self.filename):
+            logger.info(f"{self.filename} bulunamadi Yeni dosya oluşturalim.")
+            remove_quietly(self.index_filename)
+            return
+        
+        try:
+            self._snapshot = SnapshotIndex(self.filename, self.index_filename)
+            return
+        except ValueError:
+            logger.info(f"{self.index_filename} yeniden oluşturuluyor")
+        
+        if not build_index(self.filename, self.index_filename):
+            self._write(self._read_snapshot().values())
+        self._snapshot = SnapshotIndex(self.filename, self.index_filename)
+    
+    def _snapshot_position(self, isbn: str) -> Optional[int]:
+        
+        if self._snapshot is None or isbn in self._removed:
+            return None
+        return self._snapshot.find(isbn)
+    
+    def _snapshot_book(self, isbn: str) -> Optional[Book]:
+        
+        book = self._cache.get(isbn)
+        if book is not None:
+            self._cache.move_to_end(isbn)
+            return book
+        position = self._snapshot_position(isbn)
+        if position is None:
+            return None
+        book = self._cache[isbn] = Book.from_dict(self._snapshot.read(position))
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return book
+    
+    def _snapshot_records(self) -> List[dict]:
+        
+        if self._snapshot is None:
+            return []
+        return [data for data in self._snapshot.read_all() if data["isbn"] not in self._removed]
+    
+    def _ensure_search(self) -> SearchIndex:
+        
+        if self._search is None:
+            records = self._snapshot_records() + [book.to_dict() for book in self._books.values()]
+            self._search = SearchIndex()
+            self._search.build((data["isbn"], f"{data['title']} {data['author']}") for data in records)
+        return self._search
+    
+    def save_books(self) -> None:
+        
+        books_data = self._snapshot_records() + [book.to_dict() for book in self._books.values()]
+        self._close_snapshot()
+        try:
+            self._write(books_data)
+        finally:
+            self._open_snapshot()
+        self._books, self._sorted_isbns, self._removed = {}, SortedKeys(), set()
+    
+    def _snapshot_job(self) -> Callable[[], Callable[[], None]]:
+        
+        snapshot, books, removed = self._snapshot, dict(self._books), set(self._removed)
+        
+        def write() -> Callable[[], None]:
+            records = snapshot.read_all() if snapshot is not None else []
+            self._write([data for data in records if data["isbn"] not in removed] +
+                        [book.to_dict() for book in books.values()])
+            return partial(self._swap_snapshot, books, removed)
+        return write
+    
+    def _swap_snapshot(self, books: Dict[str, Book], removed: Set[str]) -> None:
+        
+        self._close_snapshot()
+        self._open_snapshot()
+        self._removed -= removed
+        for isbn, book in books.items():
+            if self._books.get(isbn) is book:
+                del self._books[isbn]
+                self._sorted_isbns.remove(isbn)
+            else:
+                self._removed.add(isbn)
+    
+    def _write(self, books: Iterable) -> None:
+        
+        try:
+            books_data = [book if isinstance(book, dict) else book.to_dict() for book in books]
+            write_snapshot(self.filename, books_data, index_filename=self.index_filename)
+        except Exception as e:
+            logger.error(f"Dosya kaydedilirkenki hatası {e}")
+            raise
+    
+    def close(self) -> None:
+        
+        super().close()
+        self._close_snapshot()
+    
+    def _close_snapshot(self) -> None:
+        
+        if self._snapshot is not None:
+            self._snapshot.close()
+            self._snapshot = None
+    
+    def _apply(self, entry: dict) -> None:
+        
+        if entry.get("op") == "add":
+            book = Book.from_dict(entry["book"])
+            if book.isbn not in self:
+                self._insert(book)
+        elif entry.get("op") == "remove":
+            self._discard(entry["isbn"])
+
+
+class SQLiteLibrary(Library):
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS books (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            isbn TEXT NOT NULL,
+            title TEXT NOT NULL,
+            author TEXT NOT NULL
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_books_isbn ON books (isbn);
+        CREATE TABLE IF NOT EXISTS author_counts (
+            author TEXT PRIMARY KEY,
+            books INTEGER NOT NULL
+        ) WITHOUT ROWID;
+        CREATE TRIGGER IF NOT EXISTS trg_books_insert AFTER INSERT ON books BEGIN
+            INSERT INTO author_counts (author, books) VALUES (NEW.author, 1)
+                ON CONFLICT (author) DO UPDATE SET books = books + 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_books_delete AFTER DELETE ON books BEGIN
+            UPDATE author_counts SET books = books - 1 WHERE author = OLD.author;
+            DELETE FROM author_counts WHERE author = OLD.author AND books <= 0;
+        END;
+        CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+            text, tokenize = 'unicode61 remove_diacritics 0'
+        );
+        CREATE TRIGGER IF NOT EXISTS trg_books_fts_insert AFTER INSERT ON books BEGIN
+            INSERT INTO books_fts (rowid, text) VALUES (NEW.id, fold_text(NEW.title || ' ' || NEW.author));
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_books_fts_delete AFTER DELETE ON books BEGIN
+            DELETE FROM books_fts WHERE rowid = OLD.id;
+        END;
+    """
+    DROP_SEARCH = """
+        DROP TRIGGER IF EXISTS trg_books_fts_insert;
+        DROP TRIGGER IF EXISTS trg_books_fts_delete;
+        DROP TABLE IF EXISTS books_fts;
+    """
+    BACKFILL_AUTHORS = """
+        INSERT INTO author_counts (author, books)
+        SELECT author, COUNT(*) FROM books GROUP BY author
+    """
+    BACKFILL_SEARCH = """
+        INSERT INTO books_fts (rowid, text)
+        SELECT id, fold_text(title || ' ' || author) FROM books
+    """
+    SEARCH = """
+        SELECT b.title, b.author, b.isbn FROM books_fts f JOIN books b ON b.id = f.rowid
+        WHERE books_fts MATCH ? LIMIT ?
+    """
+    SELECT_ALL = "SELECT title, author, isbn FROM books ORDER BY id"
+    SELECT_ONE = "SELECT title, author, isbn FROM books WHERE isbn = ?"
+    SELECT_FIRST_PAGE = "SELECT title, author, isbn FROM books ORDER BY isbn LIMIT ?"
+    SELECT_PAGE = "SELECT title, author, isbn FROM books WHERE isbn > ? ORDER BY isbn LIMIT ?"
+    INSERT = "INSERT INTO books (title, author, isbn) VALUES (?, ?, ?)"
+    INSERT_OR_IGNORE = "INSERT OR IGNORE INTO books (title, author, isbn) VALUES (?, ?, ?)"
+    DELETE = "DELETE FROM books WHERE isbn = ?"
+    COUNT = "SELECT COUNT(*) FROM books"
+    
+    def __init__(self, filename: str = "library.db", cache: Optional[MetadataCache] = None):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(filename, check_same_thread=False, isolation_level=None,
+                                     cached_statements=256)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.create_function("fold_text", 1, fold, deterministic=True)
+        super().__init__(filename, cache=cache)
+    
+    @property
+    def books(self) -> List[Book]:
+        
+        return self.list_books()
+    
+    @property
+    def generation(self) -> Hashable:
+        
+        with self._lock:
+            return self._generation, self._conn.execute("PRAGMA data_version").fetchone()[0]
+    
+    def __len__(self) -> int:
+        
+        return self._conn.execute(self.COUNT).fetchone()[0]
+    
+    def __contains__(self, isbn: str) -> bool:
+        
+        return self.find_book(isbn) is not None
+    
+    def add_book(self, book: Book) -> None:
+        
+        try:
+            with self._lock:
+                self._conn.execute(self.INSERT, (book.title, book.author, book.isbn))
+                self._generation = next(GENERATIONS)
+        except sqlite3.IntegrityError:
+            raise ValueError(f"ISBN {book.isbn} zaten var")
+    
+    def remove_book(self, isbn: str) -> bool:
+        
+        with self._lock:
+            removed = self._conn.execute(self.DELETE, (isbn,)).rowcount > 0
+            if removed:
+                self._generation = next(GENERATIONS)
+            return removed
+    
+    def list_books(self) -> List[Book]:
+        
+        return [Book(*row) for row in self._conn.execute(self.SELECT_ALL)]
+    
+    def find_book(self, isbn: str) -> Optional[Book]:
+        
+        row = self._conn.execute(self.SELECT_ONE, (isbn,)).fetchone()
+        return Book(*row) if row else None
+    
+    def page_books(self, cursor: Optional[str] = None, limit: int = 100) -> List[Book]:
+        
+        if cursor:
+            rows = self._conn.execute(self.SELECT_PAGE, (cursor, limit))
+        else:
+            rows = self._conn.execute(self.SELECT_FIRST_PAGE, (limit,))
+        return [Book(*row) for row in rows]
+    
+    def author_counts(self) -> Dict[str, int]:
+        
+        return dict(self._conn.execute("SELECT author, books FROM author_counts"))
+    
+    def search_books(self, query: str, limit: int = 20) -> List[Book]:
+        
+        terms = tokenize(query)
+        if not terms:
+            return []
+        match = " ".join(f'"{term}"*' for term in terms)
+        return [Book(*row) for row in self._conn.execute(self.SEARCH, (match, limit))]
+    
+    def load_books(self) -> None:
+        
+        with self._lock:
+            if "isbn" in (row[1] for row in self._conn.execute("PRAGMA table_info(books_fts)")):
+                self._conn.executescript(self.DROP_SEARCH)
+            self._conn.executescript(self.SCHEMA)
+            if self._conn.execute("SELECT 1 FROM books LIMIT 1").fetchone():
+                if self._conn.execute("SELECT 1 FROM author_counts LIMIT 1").fetchone() is None:
+                    self._conn.execute(self.BACKFILL_AUTHORS)
+                if self._conn.execute("SELECT 1 FROM books_fts LIMIT 1").fetchone() is None:
+                    self._conn.execute(self.BACKFILL_SEARCH)
+    
+    def save_books(self) -> None:
+        
+        pass
+    
+    def add_books(self, books: Iterable[Book]) -> List[Book]:
+        
+        added = []
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for book in books:
+                    if self._conn.execute(self.INSERT_OR_IGNORE, (book.title, book.author, book.isbn)).rowcount:
+                        added.append(book)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            if added:
+                self._generation = next(GENERATIONS)
+        return added
+    
+    def import_books(self, books: Iterable[Book]) -> int:
+        
+        return len(self.add_books(books))
+    
+    def compact(self) -> None:
+        
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    
+    def close(self) -> None:
+        
+        self._conn.close()
+
+
+LIBRARY_FILE = os.getenv("LIBRARY_FILE", "library.json")
+LIBRARY_JOURNAL = os.getenv("LIBRARY_JOURNAL", "1") == "1"
+LIBRARY_FSYNC_EVERY = int(os.getenv("LIBRARY_FSYNC_EVERY", "1"))
+LIBRARY_LAZY = os.getenv("LIBRARY_LAZY", "0") == "1"
+LIBRARY_FORMAT = os.getenv("LIBRARY_FORMAT", "json")
+LIBRARY_DURABILITY = os.getenv("LIBRARY_DURABILITY", "async")
+LIBRARY_FLUSH_MS = int(os.getenv("LIBRARY_FLUSH_MS", "50"))
+LIBRARY_FLUSH_EVERY = int(os.getenv("LIBRARY_FLUSH_EVERY", "100"))
+LIBRARY_SHARED = os.getenv("LIBRARY_SHARED", "0") == "1"
+LIBRARY_BACKEND = os.getenv("LIBRARY_BACKEND", "json")
+LIBRARY_DB = os.getenv("LIBRARY_DB", "library.db")
+OPENLIBRARY_CACHE = os.getenv("OPENLIBRARY_CACHE", "openlibrary_cache.db")
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+BULK_IMPORT_LIMIT = int(os.getenv("BULK_IMPORT_LIMIT", "10000"))
+
 library = None
+books_cache = ResponseCache()
+metrics = MetricsRegistry()
+flush_observer = timing_observer(
+    metrics.histogram("library_flush_duration_seconds", "Kütüphane değişikliklerinin diske yazılma süresi"),
+    metrics.counter("library_flushes_total", "Sonuçlarına göre diske yazmalar", ("outcome",))
+)
+metrics.gauge("library_books", "Katalogdaki kitap sayısı").set_function(lambda: len(library) if library is not None else 0)
+
+
+def create_library(cache: Optional[MetadataCache] = None) -> Library:
+    
+    if LIBRARY_BACKEND == "sqlite":
+        return SQLiteLibrary(LIBRARY_DB, cache=cache)
+    if LIBRARY_LAZY:
+        return LazyLibrary(LIBRARY_FILE, journal=LIBRARY_JOURNAL, fsync_every=LIBRARY_FSYNC_EVERY, cache=cache,
+                           shared=LIBRARY_SHARED)
+    return Library(LIBRARY_FILE, journal=LIBRARY_JOURNAL, fsync_every=LIBRARY_FSYNC_EVERY, cache=cache,
+                   snapshot_format=LIBRARY_FORMAT, shared=LIBRARY_SHARED)
+
+
+def create_http_client() -> httpx.AsyncClient:
+    
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        timeout=10,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30)
+    )
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -174,10 +1093,23 @@ async def lifespan(app: FastAPI):
     global library
     logger.info("FastAPI Library Management System başlatıl")
     
-    library = Library("library.json")
-    logger.info(f"Kütüphane yüklendi Toplam {len(library.books)} kitap ")
+    cache = MetadataCache(OPENLIBRARY_CACHE or None)
+    library = create_library(cache)
+    library.http_client = create_http_client()
+    instrument_backend(metrics, library.upstream)
+    if not isinstance(library, SQLiteLibrary) and not library.shared:
+        library.persistence = PersistenceWorker(library.prepare_flush, interval=LIBRARY_FLUSH_MS / 1000,
+                                                max_pending=LIBRARY_FLUSH_EVERY, durability=LIBRARY_DURABILITY,
+                                                observer=flush_observer)
+        library.persistence.start()
+    logger.info(f"Kütüphane yüklendi Toplam {len(library)} kitap ")
     
     yield  
+    if library.persistence is not None:
+        await library.persistence.stop()
+    await library.http_client.aclose()
+    library.close()
+    cache.close()
     logger.info("FastAPI Library Management System kapatıldi")
 
 
@@ -190,6 +1122,23 @@ app = FastAPI(
 
 
 
+class SharedLibraryMiddleware:
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        
+        if scope["type"] == "http" and library is not None:
+            await library.refreshed()
+        await self.app(scope, receive, send)
+
+
+if LIBRARY_SHARED:
+    app.add_middleware(SharedLibraryMiddleware)
+app.add_middleware(MetricsMiddleware, registry=metrics)
+
+
 @app.get("/")
 async def root():
     
@@ -204,15 +1153,30 @@ async def health_check():
     
     return {
         "status": "healthy",
-        "total_books": len(library.books) if library else 0
+        "total_books": len(library) if library is not None else 0
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    
+    return metrics.response()
+
 @app.get("/books", response_model=List[BookResponse])
-async def get_all_books():
+async def get_all_books(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="sayfadaki kitap sayisi"),
+    cursor: Optional[str] = Query(None, description="önceki sayfanin son ISBN'i")
+):
     
     try:
-        books = library.list_books()
-        return [BookResponse(**book.to_dict()) for book in books]
+        if limit is None and cursor is None:
+            return books_cache.respond(request, "books", library.generation,
+                                       lambda: [book.to_dict() for book in library.list_books()])
+        
+        limit = limit or 100
+        books = library.page_books(cursor, limit)
+        headers = {"X-Next-Cursor": books[-1].isbn} if len(books) == limit else None
+        return json_response([book.to_dict() for book in books], headers)
     except Exception as e:
         logger.error(f"Kitapları listelerkenki hata: {e}")
         raise HTTPException(
@@ -220,6 +1184,31 @@ async def get_all_books():
             detail="Kitaplar listelenirken hata "
         )
 
+@app.get("/books/stream")
+async def stream_all_books():
+    
+    async def generate():
+        for book in library.iter_books():
+            yield json.dumps(book.to_dict(), ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@app.get("/books/search", response_model=List[BookResponse])
+async def search_books(
+    q: str = Query(..., min_length=1, description="başlık veya yazar adı"),
+    limit: int = Query(20, ge=1, le=100, description="en fazla sonuç sayisi")
+):
+    
+    try:
+        books = library.search_books(q, limit)
+        return [BookResponse(**book.to_dict()) for book in books]
+    except Exception as e:
+        logger.error(f"Kitap aranırken hata: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Kitap aranırken bir hata oluştu"
+        )
+
 @app.post("/books", response_model=BookResponse, status_code=status.HTTP_201_CREATED)
 async def add_book_by_isbn(book_data: BookCreate):
     
@@ -239,6 +1228,17 @@ async def add_book_by_isbn(book_data: BookCreate):
         logger.info(f"Yeni kitap eklendik: {book.title}")
         return BookResponse(**book.to_dict())
         
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=upstream_error_message(e),
+            headers={"Retry-After": str(max(int(e.retry_after), 1))}
+        )
+    except (httpx.TimeoutException, asyncio.TimeoutError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=upstream_error_message(e)
+        )
     except ValueError as e:
         
         raise HTTPException(
@@ -252,6 +1252,76 @@ async def add_book_by_isbn(book_data: BookCreate):
             detail="kitap eklenirken bir hata oluştu"
         )
 
+ISBN_PATTERN = re.compile(r"[0-9]{9,16}[0-9X]")
+
+
+def parse_isbn_list(body: bytes, content_type: str) -> List[str]:
+    
+    if content_type.startswith("application/json"):
+        data = json.loads(body)
+        if isinstance(data, dict):
+            data = data.get("isbns", [])
+        if not isinstance(data, list) or not all(isinstance(item, str) for item in data):
+            raise ValueError("ISBN listesi bir metin dizisi olmalı")
+        values = data
+    else:
+        values = body.decode("utf-8-sig").replace(",", "\n").splitlines()
+    
+    isbns = [value.strip().replace("-", "").replace(" ", "").upper() for value in values]
+    isbns = [isbn for isbn in isbns if isbn]
+    invalid = [isbn[:20] for isbn in isbns if not ISBN_PATTERN.fullmatch(isbn)]
+    if invalid:
+        raise ValueError(f"geçersiz ISBN: {', '.join(invalid[:5])}")
+    return isbns
+
+async def parse_isbn_form(request: Request) -> List[str]:
+    
+    isbns = []
+    async with request.form() as form:
+        for _, value in form.multi_items():
+            if isinstance(value, str):
+                isbns.extend(parse_isbn_list(value.encode("utf-8"), "text/plain"))
+            else:
+                isbns.extend(parse_isbn_list(await value.read(), value.content_type or "text/plain"))
+    return isbns
+
+@app.post("/books/bulk")
+async def bulk_import_books(
+    request: Request,
+    concurrency: int = Query(8, ge=1, le=64, description="aynı anda yapılacak API isteği"),
+    retries: int = Query(2, ge=0, le=5, description="geçici hatalarda tekrar sayısı")
+):
+    
+    content_type = request.headers.get("content-type", "")
+    try:
+        if content_type.startswith("multipart/form-data"):
+            isbns = await parse_isbn_form(request)
+        else:
+            isbns = parse_isbn_list(await request.body(), content_type)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"ISBN listesi okunamadı: {e}"
+        )
+    
+    if not isbns:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ISBN listesi boş olamaz"
+        )
+    if len(isbns) > BULK_IMPORT_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Tek seferde en fazla {BULK_IMPORT_LIMIT} ISBN eklenebilir"
+        )
+    
+    async def generate():
+        async for result in library.import_isbns(isbns, concurrency=concurrency, retries=retries):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+    
+    logger.info(f"Toplu ekleme başladı: {len(isbns)} ISBN")
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
 @app.delete("/books/{isbn}", status_code=status.HTTP_200_OK)
 async def delete_book(isbn: str):
     
@@ -268,9 +1338,11 @@ async def delete_book(isbn: str):
             )
         
         
-        success = library.remove_book(isbn)
+        async with library.locked():
+            success = library.remove_book(isbn)
         
         if success:
+            await library.persisted()
             logger.info(f"kitap silindi: {book.title}")
             return {
                 "message": "Kitap başarıyla silindi",
@@ -317,17 +1389,30 @@ async def get_book_by_isbn(isbn: str):
         )
 
 @app.get("/stats")
-async def get_library_stats():
+async def get_library_stats(
+    top: Optional[int] = Query(None, ge=1, description="en çok kitabi olan N yazar"),
+    offset: int = Query(0, ge=0, description="atlanacak yazar sayisi"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="döndürülecek yazar sayisi")
+):
    
     try:
-        books = library.list_books()
-        authors = set(book.author for book in books)
+        counts = library.author_counts()
+        
+        if top is not None:
+            books_by_author = dict(heapq.nlargest(top, counts.items(), key=lambda item: item[1]))
+        elif offset or limit is not None:
+            if limit is None:
+                authors = sorted(counts.items())
+            else:
+                authors = heapq.nsmallest(offset + limit, counts.items())
+            books_by_author = dict(authors[offset:])
+        else:
+            books_by_author = counts
         
         return {
-            "total_books": len(books),
-            "total_authors": len(authors),
-            "books_by_author": {author: sum(1 for book in books if book.author == author) 
-                              for author in authors}
+            "total_books": len(library),
+            "total_authors": len(counts),
+            "books_by_author": books_by_author
         }
     except Exception as e:
         logger.error(f"istatistikler alınırken hata: {e}")
@@ -0,0 +1,243 @@
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import math
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORKDIR = tempfile.mkdtemp(prefix="bench_load_")
+os.environ.setdefault("OPENLIBRARY_CACHE", "")
+os.environ.setdefault("NOTIFICATION_LOG", os.path.join(WORKDIR, "log.txt"))
+os.environ.setdefault("RATE_LIMIT_STORAGE", f"sqlite:///{os.path.join(WORKDIR, 'ratelimits.db')}")
+
+import httpx
+
+import api
+import FastAPI as fastapi_app
+
+
+ISBN_BASE = 9780000000000
+
+RequestSpec = Tuple[str, str, dict]
+
+
+def make_isbn(i: int) -> str:
+
+    return str(ISBN_BASE + i)
+
+
+def make_books(count: int) -> List[api.Book]:
+
+    author_count = max(count // 20, 1)
+    return [api.Book(f"Kitap Başlığı {i}", f"Yazar {i % author_count}", make_isbn(i)) for i in range(count)]
+
+
+def openlibrary_stub(latency: float) -> Callable:
+
+    async def handle(request: httpx.Request) -> httpx.Response:
+        if latency:
+            await asyncio.sleep(latency)
+        path = request.url.path
+        if path.startswith("/isbn/"):
+            isbn = path[len("/isbn/"):-len(".json")]
+            return httpx.Response(200, json={
+                "title": f"Yeni Kitap {isbn}",
+                "authors": [{"key": f"/authors/OL{int(isbn) % 1000}A"}]
+            })
+        if path.startswith("/authors/"):
+            return httpx.Response(200, json={"name": f"Yazar {path[len('/authors/'):-len('.json')]}"})
+        return httpx.Response(404)
+
+    return handle
+
+
+def api_scenarios(books: int, rng: random.Random) -> Dict[str, Callable[[int], RequestSpec]]:
+
+    author_count = max(books // 20, 1)
+    return {
+        "api.get": lambda i: ("GET", f"/books/{make_isbn(rng.randrange(books))}", {}),
+        "api.list_page": lambda i: ("GET", "/books", {"params": {"limit": 100, "cursor": make_isbn(rng.randrange(books))}}),
+        "api.list_all_304": lambda i: ("GET", "/books", {"headers": {"If-None-Match": "*"}}),
+        "api.list_all": lambda i: ("GET", "/books", {}),
+        "api.search": lambda i: ("GET", "/books/search", {"params": {"q": f"Yazar {rng.randrange(author_count)}"}}),
+        "api.stats": lambda i: ("GET", "/stats", {"params": {"top": 10}}),
+        "api.create": lambda i: ("POST", "/books", {"json": {"isbn": make_isbn(books + i)}}),
+        "api.delete": lambda i: ("DELETE", f"/books/{make_isbn(books + i)}", {}),
+    }
+
+
+def fastapi_scenarios(books: int, rng: random.Random) -> Dict[str, Callable[[int], RequestSpec]]:
+
+    return {
+        "fastapi.get": lambda i: ("GET", f"/books/{rng.randrange(books) + 1}", {}),
+        "fastapi.list": lambda i: ("GET", "/books/", {"params": {"skip": rng.randrange(books), "limit": 100}}),
+        "fastapi.list_all": lambda i: ("GET", "/api/v1/books", {}),
+        "fastapi.limited": lambda i: ("GET", "/limited-books", {}),
+        "fastapi.update": lambda i: ("PUT", f"/books/{rng.randrange(books) + 1}", {
+            "json": {"title": f"Güncel Başlık {i}", "author": "Yazar", "publication_year": 2000}
+        }),
+        "fastapi.create": lambda i: ("POST", "/books/", {
+            "json": {"title": f"Yeni Kitap {i}", "author": "Yazar", "publication_year": 2000}
+        }),
+        "fastapi.delete": lambda i: ("DELETE", f"/books/{books + i + 1}", {}),
+    }
+
+
+HEAVY = {"api.list_all", "fastapi.list_all"}
+SCENARIOS = list(api_scenarios(1, random.Random())) + list(fastapi_scenarios(1, random.Random()))
+
+
+def percentile(latencies: List[float], p: float) -> float:
+
+    rank = max(math.ceil(p / 100 * len(latencies)) - 1, 0)
+    return round(latencies[rank] * 1000, 3)
+
+
+async def drive(client: httpx.AsyncClient, build: Callable[[int], RequestSpec], requests: int,
+                concurrency: int) -> dict:
+
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    counter = itertools.count()
+
+    async def worker():
+        while True:
+            i = next(counter)
+            if i >= requests:
+                return
+            method, url, options = build(i)
+            start = time.perf_counter()
+            response = await client.request(method, url, **options)
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "seconds": round(elapsed, 4),
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": round(latencies[-1] * 1000, 3),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+def make_client(app) -> httpx.AsyncClient:
+
+    transport = httpx.ASGITransport(app=app, client=("127.0.0.1", 50000))
+    return httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None)
+
+
+async def run_api(books: int, names: List[str], args, rng: random.Random) -> List[dict]:
+
+    directory = tempfile.mkdtemp(prefix=f"api_{books}_", dir=WORKDIR)
+    api.LIBRARY_FILE = os.path.join(directory, "library.json")
+    api.LIBRARY_DB = os.path.join(directory, "library.db")
+
+    results = []
+    async with api.app.router.lifespan_context(api.app):
+        api.library.add_books(make_books(books))
+        await api.library.http_client.aclose()
+        api.library.http_client = httpx.AsyncClient(
+            transport=httpx.MockTransport(openlibrary_stub(args.upstream_latency / 1000))
+        )
+        scenarios = api_scenarios(books, rng)
+        async with make_client(api.app) as client:
+            for name in names:
+                if name in scenarios:
+                    result = await drive(client, scenarios[name], args.requests, args.concurrency)
+                    results.append({"scenario": name, **result})
+    return results
+
+
+async def run_fastapi(books: int, names: List[str], args, rng: random.Random) -> List[dict]:
+
+    results = []
+    async with fastapi_app.app.router.lifespan_context(fastapi_app.app):
+        fastapi_app.books_db.clear()
+        for book_id in range(1, books + 1):
+            fastapi_app.books_db.add({"id": book_id, "title": f"Kitap Başlığı {book_id}",
+                                      "author": f"Yazar {book_id % 100}", "publication_year": 2000})
+        fastapi_app.book_id_counter = books + 1
+        fastapi_app.limiter.reset()
+        scenarios = fastapi_scenarios(books, rng)
+        async with make_client(fastapi_app.app) as client:
+            for name in names:
+                if name in scenarios:
+                    result = await drive(client, scenarios[name], args.requests, args.concurrency)
+                    results.append({"scenario": name, **result})
+    return results
+
+
+async def run(args) -> List[dict]:
+
+    names = args.scenarios or [name for name in SCENARIOS if name not in HEAVY]
+    results = []
+    for books in args.books:
+        rng = random.Random(args.seed)
+        for runner in (run_api, run_fastapi):
+            for result in await runner(books, names, args, rng):
+                results.append({**result, "books": books, "concurrency": args.concurrency})
+    return results
+
+
+def main(argv: Optional[List[str]] = None):
+
+    parser = argparse.ArgumentParser(description="api.py ve FastAPI.py uygulamalarını süreç içinde yük altında ölçer")
+    parser.add_argument("--books", type=int, nargs="+", default=[1000], help="katalog boyutları, örn. 1000 100000 1000000")
+    parser.add_argument("--requests", type=int, default=1000, help="senaryo başına istek sayısı")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS,
+                        help=f"çalıştırılacak senaryolar (varsayılan: {', '.join(sorted(HEAVY))} hariç hepsi)")
+    parser.add_argument("--upstream-latency", type=float, default=0, help="OpenLibrary taklidinin gecikmesi (ms)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="sonucu JSON olarak yaz")
+    parser.add_argument("--output", help="sonucu JSON dosyasına yaz")
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(logging.ERROR)
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        shutil.rmtree(WORKDIR, ignore_errors=True)
+
+    if args.output:
+        report = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'scenario':<20}{'books':>10}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  statuses")
+    for result in results:
+        statuses = " ".join(f"{code}:{count}" for code, count in result["statuses"].items())
+        print(f"{result['scenario']:<20}{result['books']:>10}{result['rps']:>10}{result['p50_ms']:>10}"
+              f"{result['p95_ms']:>10}{result['p99_ms']:>10}  {statuses}")
+
+
+if __name__ == "__main__":
+    main()
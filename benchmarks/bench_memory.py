@@ -0,0 +1,96 @@
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class LegacyBook:
+
+    def __init__(self, title: str, author: str, isbn: str):
+        self.title = title
+        self.author = author
+        self.isbn = isbn
+
+
+def make_records(count: int):
+
+    author_count = max(count // 20, 1)
+    for i in range(count):
+        yield f"Kitap Başlığı {i}", f"Yazar {i % author_count}", f"{9780000000000 + i}"
+
+
+def book_class(variant: str) -> type:
+
+    if variant == "legacy":
+        return LegacyBook
+    from api import Book
+    return Book
+
+
+def peak_rss_mb() -> float:
+
+    if resource is None:
+        return float("nan")
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage / 1024 / 1024 if sys.platform == "darwin" else usage / 1024
+
+
+def measure(variant: str, count: int) -> dict:
+
+    cls = book_class(variant)
+    gc.collect()
+    rss_before = peak_rss_mb()
+    tracemalloc.start()
+    books = [cls(title, author, isbn) for title, author, isbn in make_records(count)]
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = peak_rss_mb()
+    return {
+        "variant": variant,
+        "books": len(books),
+        "traced_mb": round(traced / 1024 / 1024, 1),
+        "rss_growth_mb": round(rss_after - rss_before, 1),
+    }
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Book nesnelerinin bellek kullanımını karşılaştırır")
+    parser.add_argument("--books", type=int, default=1_000_000)
+    parser.add_argument("--variant", choices=["legacy", "slots"])
+    parser.add_argument("--json", action="store_true", help="sonucu JSON olarak yaz")
+    args = parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(measure(args.variant, args.books)))
+        return
+
+    results = []
+    for variant in ("legacy", "slots"):
+        output = subprocess.run(
+            [sys.executable, __file__, "--books", str(args.books), "--variant", variant],
+            check=True, capture_output=True, text=True
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'variant':<10}{'books':>10}{'traced MB':>12}{'RSS +MB':>10}")
+    for result in results:
+        print(f"{result['variant']:<10}{result['books']:>10}{result['traced_mb']:>12}{result['rss_growth_mb']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import argparse
+import json
+import os
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from api import Book, BookResponse
+import response_cache
+
+
+def make_books(count: int) -> List[Book]:
+
+    author_count = max(count // 20, 1)
+    return [Book(f"Kitap Başlığı {i}", f"Yazar {i % author_count}", f"{9780000000000 + i}") for i in range(count)]
+
+
+def pydantic_path(books: List[Book]) -> bytes:
+
+    models = [BookResponse(**book.to_dict()) for book in books]
+    validated = [BookResponse.model_validate(model) for model in models]
+    return json.dumps(jsonable_encoder(validated), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def type_adapter_path(books: List[Book]) -> bytes:
+
+    return BOOK_LIST.dump_json(BOOK_LIST.validate_python(books, from_attributes=True))
+
+
+def stdlib_json_path(books: List[Book]) -> bytes:
+
+    return json.dumps([book.to_dict() for book in books], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(books: List[Book]) -> bytes:
+
+    return response_cache.dump_json([book.to_dict() for book in books])
+
+
+BOOK_LIST = TypeAdapter(List[BookResponse])
+PATHS = {
+    "pydantic": pydantic_path,
+    "type_adapter": type_adapter_path,
+    "json": stdlib_json_path,
+    "fast": fast_path,
+}
+
+
+def measure(name: str, books: List[Book], repeat: int) -> dict:
+
+    encode = PATHS[name]
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = encode(books)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {
+        "path": name,
+        "books": len(books),
+        "seconds": round(best, 4),
+        "books_per_s": round(len(books) / best),
+        "bytes": len(body),
+    }
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="GET /books yanıtının farklı JSON serileştirme yollarını karşılaştırır")
+    parser.add_argument("--books", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="sonucu JSON olarak yaz")
+    args = parser.parse_args()
+
+    books = make_books(args.books)
+    results = [measure(name, books, args.repeat) for name in PATHS]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"fast yolu: {'orjson' if response_cache.orjson is not None else 'json'}")
+    print(f"{'path':<14}{'books':>10}{'seconds':>10}{'books/s':>12}{'bytes':>12}")
+    for result in results:
+        print(f"{result['path']:<14}{result['books']:>10}{result['seconds']:>10}{result['books_per_s']:>12}{result['bytes']:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import Book, Library
+
+
+def make_books(count: int):
+
+    author_count = max(count // 20, 1)
+    return [Book(f"Kitap Başlığı {i}", f"Yazar {i % author_count}", f"{9780000000000 + i}") for i in range(count)]
+
+
+def best_of(repeat: int, func) -> float:
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def measure(snapshot_format: str, books, directory: str, repeat: int) -> dict:
+
+    filename = os.path.join(directory, f"library.{snapshot_format}")
+    library = Library(filename, snapshot_format=snapshot_format)
+    library.add_books(books)
+
+    save = best_of(repeat, library.save_books)
+    load = best_of(repeat, library._read_snapshot)
+    return {
+        "format": snapshot_format,
+        "books": len(library),
+        "size_mb": round(os.path.getsize(filename) / 1024 / 1024, 1),
+        "save_s": round(save, 3),
+        "load_s": round(load, 3),
+        "save_books_per_s": round(len(books) / save),
+        "load_books_per_s": round(len(books) / load),
+    }
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="JSON ve ikili snapshot formatlarının kaydetme/yükleme hızını karşılaştırır")
+    parser.add_argument("--books", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="sonucu JSON olarak yaz")
+    args = parser.parse_args()
+
+    books = make_books(args.books)
+    with tempfile.TemporaryDirectory() as directory:
+        results = [measure(snapshot_format, books, directory, args.repeat) for snapshot_format in ("json", "binary")]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'format':<8}{'books':>10}{'MB':>8}{'save s':>9}{'load s':>9}{'save/s':>12}{'load/s':>12}")
+    for result in results:
+        print(f"{result['format']:<8}{result['books']:>10}{result['size_mb']:>8}{result['save_s']:>9}"
+              f"{result['load_s']:>9}{result['save_books_per_s']:>12}{result['load_books_per_s']:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+class VersionConflict(ValueError):
+
+    def __init__(self, book_id: int, version: int):
+        super().__init__(f"{book_id} id'li kitabın güncel sürümü {version}")
+        self.version = version
+
+
+class BookStore:
+
+    def __init__(self, books: Iterable[dict] = ()):
+        self._books: Dict[int, dict] = {}
+        self._versions: Dict[int, int] = {}
+        self._tree: List[int] = [0]
+        self.generation = 0
+        for book in books:
+            self.add(book)
+
+    def __len__(self) -> int:
+
+        return len(self._books)
+
+    def __contains__(self, book_id: int) -> bool:
+
+        return book_id in self._books
+
+    def __iter__(self) -> Iterator[dict]:
+
+        return iter(self._books.values())
+
+    def get(self, book_id: int) -> Optional[dict]:
+
+        return self._books.get(book_id)
+
+    def version(self, book_id: int) -> Optional[int]:
+
+        return self._versions.get(book_id)
+
+    def add(self, book: dict) -> None:
+
+        book_id = book["id"]
+        if book_id < 1:
+            raise ValueError(f"geçersiz kitap id: {book_id}")
+        if book_id in self._books:
+            raise ValueError(f"{book_id} id'li kitap zaten var")
+        if self._books and book_id < next(reversed(self._books)):
+            raise ValueError(f"kitap id'leri artan sırada eklenmeli: {book_id}")
+
+        if book_id >= len(self._tree):
+            self._grow(book_id)
+        self._books[book_id] = book
+        self._versions[book_id] = 1
+        self._update(book_id, 1)
+        self.generation += 1
+
+    def replace(self, book_id: int, book: dict, expected_version: Optional[int] = None) -> int:
+
+        version = self._versions.get(book_id)
+        if version is None:
+            raise KeyError(book_id)
+        if expected_version is not None and expected_version != version:
+            raise VersionConflict(book_id, version)
+        self._books[book_id] = book
+        self._versions[book_id] = version + 1
+        self.generation += 1
+        return version + 1
+
+    def remove(self, book_id: int) -> Optional[dict]:
+
+        book = self._books.pop(book_id, None)
+        if book is not None:
+            del self._versions[book_id]
+            self._update(book_id, -1)
+            self.generation += 1
+        return book
+
+    def slice(self, skip: int, limit: int) -> List[dict]:
+
+        end = min(skip + limit, len(self._books))
+        return [self._books[self._select(rank)] for rank in range(skip + 1, end + 1)]
+
+    def clear(self) -> None:
+
+        self._books = {}
+        self._versions = {}
+        self._tree = [0]
+        self.generation += 1
+
+    def _update(self, position: int, delta: int) -> None:
+
+        tree = self._tree
+        while position < len(tree):
+            tree[position] += delta
+            position += position & -position
+
+    def _select(self, rank: int) -> int:
+
+        tree = self._tree
+        position = 0
+        step = 1 << (len(tree) - 1).bit_length()
+        while step:
+            following = position + step
+            if following < len(tree) and tree[following] < rank:
+                position = following
+                rank -= tree[following]
+            step >>= 1
+        return position + 1
+
+    def _grow(self, book_id: int) -> None:
+
+        size = max(book_id + 1, 2 * len(self._tree))
+        tree = [0] * size
+        for position in self._books:
+            tree[position] += 1
+        for position in range(1, size):
+            parent = position + (position & -position)
+            if parent < size:
+                tree[parent] += tree[position]
+        self._tree = tree
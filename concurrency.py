@@ -0,0 +1,172 @@
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+
+        return len(self._calls)
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._calls[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: asyncio.Future) -> None:
+
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        if not future.cancelled():
+            future.exception()
+
+
+class KeyedLock:
+
+    def __init__(self):
+        self._locks: Dict[Hashable, List] = {}
+
+    def __len__(self) -> int:
+
+        return len(self._locks)
+
+    @asynccontextmanager
+    async def hold(self, key: Hashable) -> AsyncIterator[None]:
+
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+
+
+class CircuitOpenError(RuntimeError):
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} geçici olarak devre dışı, {retry_after:.0f} sn sonra tekrar denenecek")
+        self.retry_after = retry_after
+
+
+class BackendCall:
+
+    def __init__(self, func: Callable[..., Awaitable[T]], name: Optional[str] = None, timeout: float = 10,
+                 concurrency: int = 10, failure_threshold: int = 5, reset_timeout: float = 30,
+                 cache_ttl: float = 0, cache_size: int = 1024,
+                 is_failure: Optional[Callable[[T], bool]] = None,
+                 observer: Optional[Callable[[str, Optional[float]], None]] = None):
+        self.func = func
+        self.name = name or getattr(func, "__name__", "backend")
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.is_failure = is_failure
+        self.observer = observer
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._cache: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight = SingleFlight()
+
+    @property
+    def state(self) -> str:
+
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return "open"
+        return "half-open"
+
+    async def __call__(self, *args, **kwargs) -> T:
+
+        if not self.cache_ttl:
+            return await self._call(args, kwargs)
+
+        key = (args, tuple(sorted(kwargs.items())))
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._cache.move_to_end(key)
+            return entry[1]
+        return await self._inflight.do(key, lambda: self._call_and_cache(key, args, kwargs))
+
+    async def _call_and_cache(self, key: Hashable, args: tuple, kwargs: dict) -> T:
+
+        result = await self._call(args, kwargs)
+        self._cache[key] = (time.monotonic() + self.cache_ttl, result)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+    async def _call(self, args: tuple, kwargs: dict) -> T:
+
+        try:
+            probe = self._admit()
+        except CircuitOpenError:
+            self._observe("rejected", None)
+            raise
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(self._limited(args, kwargs), self.timeout)
+        except Exception as e:
+            self._record(False)
+            self._observe("timeout" if isinstance(e, asyncio.TimeoutError) else "error", time.perf_counter() - start)
+            raise
+        finally:
+            if probe:
+                self._probing = False
+        success = self.is_failure is None or not self.is_failure(result)
+        self._record(success)
+        self._observe("ok" if success else "failure", time.perf_counter() - start)
+        return result
+
+    def _observe(self, outcome: str, seconds: Optional[float]) -> None:
+
+        if self.observer is not None:
+            self.observer(outcome, seconds)
+
+    async def _limited(self, args: tuple, kwargs: dict) -> T:
+
+        async with self._semaphore:
+            return await self.func(*args, **kwargs)
+
+    def _admit(self) -> bool:
+
+        if self._opened_at is None:
+            return False
+        elapsed = time.monotonic() - self._opened_at
+        if elapsed < self.reset_timeout or self._probing:
+            raise CircuitOpenError(self.name, max(self.reset_timeout - elapsed, 0))
+        self._probing = True
+        return True
+
+    def _record(self, success: bool) -> None:
+
+        if success:
+            self.failures = 0
+            self._opened_at = None
+            return
+        self.failures += 1
+        if self.failures >= self.failure_threshold or self._opened_at is not None:
+            self._opened_at = time.monotonic()
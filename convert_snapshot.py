@@ -0,0 +1,31 @@
+import argparse
+import os
+
+from storage import read_snapshot, write_binary_snapshot, write_snapshot
+
+
+def convert(source: str, target: str, target_format: str) -> int:
+
+    records = read_snapshot(source)
+    if target_format == "binary":
+        write_binary_snapshot(target, records)
+    else:
+        write_snapshot(target, [{"title": title, "author": author, "isbn": isbn} for title, author, isbn in records])
+    return len(records)
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Kütüphane snapshot dosyasını JSON ve ikili format arasında dönüştürür")
+    parser.add_argument("source", help="okunacak snapshot (format otomatik algılanır)")
+    parser.add_argument("target", help="yazılacak snapshot")
+    parser.add_argument("--to", choices=["json", "binary"], help="hedef format (varsayılan: dosya uzantısından, .json değilse binary)")
+    args = parser.parse_args()
+
+    target_format = args.to or ("json" if os.path.splitext(args.target)[1] == ".json" else "binary")
+    count = convert(args.source, args.target, target_format)
+    print(f"{count} kitap {args.target} dosyasına {target_format} olarak yazıldı")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+# -*- coding: cp1254 -*-
+import sys
 from dataclasses import dataclass, field
 from typing import List
 from pydantic import BaseModel, Field, ValidationError
@@ -5,9 +7,11 @@ from pydantic import BaseModel, Field, ValidationError
 
 class Book:
    
+    __slots__ = ("title", "author", "isbn", "is_borrowed")
+
     def __init__(self, title: str, author: str, isbn: str):
         self.title = title
-        self.author = author
+        self.author = sys.intern(author)
         self.isbn = isbn
         self.is_borrowed = False
 
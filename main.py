@@ -4,13 +4,19 @@ import json
 import httpx
 import sys
 import os
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+
+from metadata_cache import MetadataCache
+from search import SearchIndex
+from storage import CORRUPT_SNAPSHOT_ERRORS, Journal, quarantine, write_snapshot
 
 class Book:
     
+    __slots__ = ("title", "author", "isbn")
+    
     def __init__(self, title: str, author: str, isbn: str):
         self.title = title
-        self.author = author
+        self.author = sys.intern(author)
         self.isbn = isbn
     
     def __str__(self) -> str:
@@ -32,9 +38,16 @@ class Book:
 
 class Library:
     
-    def __init__(self, filename: str = "library.json"):
+    def __init__(self, filename: str = "library.json", journal: bool = False,
+                 compact_every: int = 1000, fsync_every: int = 1,
+                 cache: Optional[MetadataCache] = None):
         self.filename = filename
+        self.cache = cache
+        self.journal = Journal(filename + ".journal", fsync_every) if journal else None
+        self.compact_every = compact_every
         self.books: List[Book] = []
+        self._by_isbn: Dict[str, Book] = {}
+        self._search = SearchIndex()
         self.load_books()
     
     def add_book(self, book: Book) -> None:
@@ -43,14 +56,18 @@ class Library:
             raise ValueError(f"ISBN {book.isbn} zaten var")
         
         self.books.append(book)
-        self.save_books()
+        self._by_isbn[book.isbn] = book
+        self._search.add(book.isbn, f"{book.title} {book.author}")
+        self._record({"op": "add", "book": book.to_dict()})
     
     def remove_book(self, isbn: str) -> bool:
        
         for i, book in enumerate(self.books):
             if book.isbn == isbn:
                 self.books.pop(i)
-                self.save_books()
+                del self._by_isbn[isbn]
+                self._search.remove(isbn)
+                self._record({"op": "remove", "isbn": isbn})
                 return True
         return False
     
@@ -60,13 +77,25 @@ class Library:
     
     def find_book(self, isbn: str) -> Optional[Book]:
         
-        for book in self.books:
-            if book.isbn == isbn:
-                return book
-        return None
+        return self._by_isbn.get(isbn)
+    
+    def search_books(self, query: str, limit: int = 20) -> List[Book]:
+        
+        return [self._by_isbn[isbn] for isbn in self._search.search(query, limit)]
     
     def load_books(self) -> None:
         
+        self._load_snapshot()
+        if self.journal is not None:
+            books = {book.isbn: book for book in self.books}
+            for entry in self.journal.replay():
+                self._apply(books, entry)
+            self.books = list(books.values())
+        self._by_isbn = {book.isbn: book for book in self.books}
+        self._search.build((book.isbn, f"{book.title} {book.author}") for book in self.books)
+    
+    def _load_snapshot(self) -> None:
+        
         try:
             with open(self.filename, 'r', encoding='utf-8') as file:
                 data = json.load(file)
@@ -74,35 +103,62 @@ class Library:
         except FileNotFoundError:
             print(f" {self.filename} bulunamadı. Yeni dosya oluşturaca.")
             self.books = []
-        except json.JSONDecodeError:
-            print(f"{self.filename} geçersiz JSON formatında. Yeni dosya oluşturulacak.")
-            self.books = []
-        except Exception as e:
-            print(f" Dosya yüklenirken hata: {e}")
+        except CORRUPT_SNAPSHOT_ERRORS as e:
+            backup = quarantine(self.filename)
+            print(f"{self.filename} yüklenemedi ({e}), {backup} olarak saklandı. Yeni dosya oluşturulacak.")
             self.books = []
     
-    def save_books(self) -> None:
+    def save_books(self) -> bool:
         
         try:
-            with open(self.filename, 'w', encoding='utf-8') as file:
-                books_data = [book.to_dict() for book in self.books]
-                json.dump(books_data, file, ensure_ascii=False, indent=2)
+            books_data = [book.to_dict() for book in self.books]
+            write_snapshot(self.filename, books_data)
+            return True
         except Exception as e:
             print(f" Dosya kaydedilirken hata: {e}")
+            return False
+    
+    def compact(self) -> None:
+        
+        if self.save_books() and self.journal is not None:
+            self.journal.truncate()
+    
+    def close(self) -> None:
+        
+        if self.journal is not None:
+            self.journal.close()
+    
+    def _record(self, entry: dict) -> None:
+        
+        if self.journal is None:
+            self.save_books()
+            return
+        
+        self.journal.append(entry)
+        if self.journal.entries >= self.compact_every:
+            self.compact()
+    
+    def _apply(self, books: dict, entry: dict) -> None:
+        
+        if entry.get("op") == "add":
+            book = Book.from_dict(entry["book"])
+            books[book.isbn] = book
+        elif entry.get("op") == "remove":
+            books.pop(entry["isbn"], None)
 
     def add_book_by_isbn(self, isbn: str) -> bool:
        
         try:
             
             url = f"https://openlibrary.org/isbn/{isbn}.json"
-            response = httpx.get(url, timeout=10)
+            status_code, data = self._fetch_json(url)
             
-            if response.status_code == 404:
+            if status_code == 404:
                 print("❌ Kitap bulunamadı. API'de böyle bir ISBN yok.")
                 return False
-            
-            response.raise_for_status()
-            data = response.json()
+            if status_code != 200:
+                print(f" API hatası: {status_code}")
+                return False
             
             
             title = data.get('title', 'Bilinmeyen Başlık')
@@ -115,9 +171,8 @@ class Library:
                         
                         author_key = author_data['key']
                         author_url = f"https://openlibrary.org{author_key}.json"
-                        author_response = httpx.get(author_url, timeout=10)
-                        if author_response.status_code == 200:
-                            author_info = author_response.json()
+                        author_status, author_info = self._fetch_json(author_url)
+                        if author_status == 200:
                             author_name = author_info.get('name', 'Bilinmeyen Yazar')
                             authors.append(author_name)
             
@@ -141,6 +196,19 @@ class Library:
         except Exception as e:
             print(f" Beklenmeyen hata: {e}")
             return False
+    
+    def _fetch_json(self, url: str) -> Tuple[int, Optional[dict]]:
+        
+        if self.cache is not None:
+            cached = self.cache.get(url)
+            if cached is not None:
+                return cached
+        
+        response = httpx.get(url, timeout=10)
+        data = response.json() if response.status_code == 200 else None
+        if self.cache is not None:
+            self.cache.set(url, response.status_code, data)
+        return response.status_code, data
 
 def clear_screen():
     
@@ -155,7 +223,7 @@ def show_menu():
     print("2. Kitap Ekle (Manuel)")
     print("3 Kitap Sil")
     print("4. Kitapları Listele")
-    print("5 Kitap Ara")
+    print("5 Kitap Ara (ISBN / başlık / yazar)")
     print("6. Çıkış")
     print("="*50)
 
@@ -276,19 +344,25 @@ def search_book_menu(library: Library):
     
     print("--- KITAP ARAMA ---")
     
-    isbn = input("Aranacak kitabın ISBN numarasını gir ").strip()
+    query = input("Aranacak kitabın ISBN numarasını, başlığını veya yazarını gir ").strip()
     
-    if not isbn:
-        print(" ISBN boş olamaz!")
+    if not query:
+        print(" Arama metni boş olamaz!")
         input("Devam etmek için Enter tuşuna bas.")
         return
     
     try:
-        book = library.find_book(isbn)
+        book = library.find_book(query)
         if book:
             print(f"\n Kitap bulundu: {book}")
         else:
-            print(" Belirtilen ISBN ile kitap bulunamadı")
+            books = library.search_books(query)
+            if books:
+                print(f"\n {len(books)} kitap bulundu:")
+                for i, book in enumerate(books, 1):
+                    print(f"{i:2d}. {book}")
+            else:
+                print(" Aramaya uygun kitap bulunamadı")
     
     except Exception as e:
         print(f" Hata: {e}")
@@ -301,12 +375,12 @@ def main():
     
     
     try:
-        library = Library("library.json")
+        library = Library("library.json", journal=True, cache=MetadataCache())
         print("Kütüphane verileri yüklendi.")
     except Exception as e:
         print(f"Veri yükleme hatası: {e}")
         print("Yeni bir kütüphane oluşturulacak.")
-        library = Library("library.json")
+        library = Library("library.json", journal=True, cache=MetadataCache())
     
     while True:
         try:
@@ -327,6 +401,7 @@ def main():
                 search_book_menu(library)
             elif choice == "6":
                 print("\n Kütüphane Yönetim Sistemi kapatılıyor...")
+                library.compact()
                 print("Verileriniz kaydedi.")
                 sys.exit(0)
             else:
@@ -335,6 +410,7 @@ def main():
         
         except KeyboardInterrupt:
             print("\n\n Program Ctrl+C ile sonlandırılıyor...")
+            library.compact()
             print("Veri kaydedildi")
             sys.exit(0)
         except Exception as e:
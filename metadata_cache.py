@@ -0,0 +1,105 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+
+CacheEntry = Tuple[int, Any]
+
+
+class MetadataCache:
+
+    CACHEABLE_STATUSES = (200, 404)
+
+    def __init__(self, filename: Optional[str] = "openlibrary_cache.db", max_entries: int = 10000,
+                 ttl: float = 7 * 24 * 3600, negative_ttl: float = 3600):
+        self.filename = filename
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._memory: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if filename:
+            self._conn = sqlite3.connect(filename, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    url TEXT PRIMARY KEY,
+                    status INTEGER NOT NULL,
+                    body TEXT,
+                    expires_at REAL NOT NULL
+                )
+            """)
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(url)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(url)
+                    return entry[1], entry[2]
+                del self._memory[url]
+
+            if self._conn is None:
+                return None
+            row = self._conn.execute(
+                "SELECT status, body, expires_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            status, body, expires_at = row
+            if expires_at <= now:
+                self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+                return None
+            data = json.loads(body) if body is not None else None
+            self._remember(url, expires_at, status, data)
+            return status, data
+
+    def set(self, url: str, status: int, data: Any) -> None:
+
+        if status not in self.CACHEABLE_STATUSES:
+            return
+        expires_at = time.time() + (self.ttl if status == 200 else self.negative_ttl)
+        with self._lock:
+            self._remember(url, expires_at, status, data)
+            if self._conn is not None:
+                body = json.dumps(data, ensure_ascii=False) if data is not None else None
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (url, status, body, expires_at) VALUES (?, ?, ?, ?)",
+                    (url, status, body, expires_at)
+                )
+
+    def purge_expired(self) -> None:
+
+        now = time.time()
+        with self._lock:
+            for url in [url for url, entry in self._memory.items() if entry[0] <= now]:
+                del self._memory[url]
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+
+    def clear(self) -> None:
+
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _remember(self, url: str, expires_at: float, status: int, data: Any) -> None:
+
+        self._memory[url] = (expires_at, status, data)
+        self._memory.move_to_end(url)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
@@ -0,0 +1,269 @@
+import bisect
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import Response
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+Labels = Tuple[str, ...]
+Observer = Callable[[str, Optional[float]], None]
+
+
+def format_value(value: float) -> str:
+
+    if value == float("inf"):
+        return "+Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Metric:
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def render(self) -> List[str]:
+
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return lines
+
+    def samples(self) -> List[str]:
+
+        raise NotImplementedError
+
+
+class Counter(Metric):
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+
+        return self._values.get(labels, 0)
+
+    def samples(self) -> List[str]:
+
+        return [f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}"
+                for labels, value in self._values.items()]
+
+
+class Gauge(Metric):
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+        self._functions: Dict[Labels, Callable[[], float]] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+
+        self._values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set_function(self, func: Callable[[], float], *labels: str) -> None:
+
+        self._functions[labels] = func
+
+    def value(self, *labels: str) -> float:
+
+        func = self._functions.get(labels)
+        return func() if func is not None else self._values.get(labels, 0)
+
+    def samples(self) -> List[str]:
+
+        values = dict(self._values)
+        for labels, func in self._functions.items():
+            values[labels] = func()
+        return [f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}"
+                for labels, value in values.items()]
+
+
+class Histogram(Metric):
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Labels, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, *labels: str) -> int:
+
+        series = self._series.get(labels)
+        return series[2] if series is not None else 0
+
+    def samples(self) -> List[str]:
+
+        lines = []
+        bounds = [format_value(bound) for bound in self.buckets] + ["+Inf"]
+        for labels, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                bucket_labels = format_labels(self.labelnames + ("le",), labels + (bound,))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            series_labels = format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{series_labels} {format_value(total)}")
+            lines.append(f"{self.name}_count{series_labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[Metric]:
+
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def response(self) -> Response:
+
+        return Response(content=self.render(), media_type=CONTENT_TYPE)
+
+    def _register(self, cls: type, name: str, documentation: str, labelnames: Sequence[str], **options) -> Metric:
+
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, documentation, labelnames, **options)
+        elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+            raise ValueError(f"{name} metriği farklı bir tanımla zaten kayıtlı")
+        return metric
+
+
+def timing_observer(histogram: Histogram, counter: Counter, *labels: str) -> Observer:
+
+    def observe(outcome: str, seconds: Optional[float]) -> None:
+        counter.inc(*labels, outcome)
+        if seconds is not None:
+            histogram.observe(seconds, *labels)
+
+    return observe
+
+
+def instrument_backend(registry: MetricsRegistry, backend) -> None:
+
+    backend.observer = timing_observer(
+        registry.histogram("backend_call_duration_seconds", "Arka uç çağrılarının süresi", ("backend",)),
+        registry.counter("backend_calls_total", "Sonuçlarına göre arka uç çağrıları", ("backend", "outcome")),
+        backend.name
+    )
+    registry.gauge("backend_circuit_open", "Devre kesicisi açık olan arka uçlar", ("backend",)).set_function(
+        lambda: int(backend.state != "closed"), backend.name
+    )
+
+
+class MetricsMiddleware:
+
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.requests = registry.counter("http_requests_total", "İşlenen HTTP istekleri",
+                                         ("method", "route", "status"))
+        self.latency = registry.histogram("http_request_duration_seconds", "HTTP isteklerinin süresi",
+                                          ("method", "route"))
+        self.in_progress = registry.gauge("http_requests_in_progress", "İşlenmekte olan HTTP istekleri",
+                                          ("method",))
+        self._routes: Dict[Callable, str] = {}
+
+    async def __call__(self, scope, receive, send):
+
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self.in_progress.inc(method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.in_progress.dec(method)
+            route = self._route(scope)
+            self.requests.inc(method, route, str(status_code))
+            self.latency.observe(elapsed, method, route)
+
+    def _route(self, scope) -> str:
+
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        route = self._routes.get(endpoint)
+        if route is None:
+            self._routes = {getattr(candidate, "endpoint", None): candidate.path
+                            for candidate in scope["app"].routes if hasattr(candidate, "path")}
+            route = self._routes.setdefault(endpoint, "unmatched")
+        return route
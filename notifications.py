@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import os
+from typing import List, Optional
+
+from storage import FileLock
+
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationSink:
+
+    def __init__(self, filename: str = "log.txt", max_batch: int = 1000, flush_interval: float = 0.2,
+                 max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5, max_queue: int = 100000):
+        self.filename = filename
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.max_queue = max_queue
+        self.written = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock = FileLock(filename + ".lock")
+
+    def start(self) -> None:
+
+        self._queue = asyncio.Queue(self.max_queue)
+        self._task = asyncio.create_task(self._run())
+
+    async def submit(self, email: str, message: str = "") -> None:
+
+        await self._queue.put(f"bildirim {email}: {message}\n")
+
+    async def stop(self) -> None:
+
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+        self._lock.close()
+
+    async def _run(self) -> None:
+
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            line = await self._queue.get()
+            if line is None:
+                return
+
+            batch = [line]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.max_batch:
+                try:
+                    line = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        line = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if line is None:
+                    stopping = True
+                    break
+                batch.append(line)
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[str]) -> None:
+
+        try:
+            await asyncio.to_thread(self._write, "".join(batch).encode("utf-8"))
+            self.written += len(batch)
+            logger.info(f"{len(batch)} bildirim yazıldı")
+        except Exception as e:
+            logger.error(f"başarıız bildirim: {e}")
+
+    def _write(self, data: bytes) -> None:
+
+        with self._lock.exclusive():
+            try:
+                size = os.path.getsize(self.filename)
+            except FileNotFoundError:
+                size = 0
+            if size and size + len(data) > self.max_bytes:
+                self._rotate()
+            with open(self.filename, "ab") as file:
+                file.write(data)
+
+    def _rotate(self) -> None:
+
+        if self.backup_count <= 0:
+            os.truncate(self.filename, 0)
+            return
+        for i in range(self.backup_count - 1, 0, -1):
+            source = f"{self.filename}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.filename}.{i + 1}")
+        os.replace(self.filename, f"{self.filename}.1")
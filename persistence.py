@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import time
+from typing import Callable, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+DURABILITY_MODES = ("async", "sync")
+
+FlushJob = Callable[[], Optional[Callable[[], None]]]
+
+
+class PersistenceWorker:
+
+    def __init__(self, prepare: Callable[[], Optional[FlushJob]], interval: float = 0.05,
+                 max_pending: int = 100, durability: str = "async",
+                 observer: Optional[Callable[[str, Optional[float]], None]] = None):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"bilinmeyen dayanıklılık modu: {durability}")
+        self.prepare = prepare
+        self.interval = interval
+        self.max_pending = max_pending
+        self.durability = durability
+        self.observer = observer
+        self.flushes = 0
+        self._pending = 0
+        self._waiters: List[asyncio.Future] = []
+        self._dirty = asyncio.Event()
+        self._full = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+
+        self._task = asyncio.create_task(self._run())
+
+    def notify(self, count: int = 1) -> None:
+
+        self._pending += count
+        self._dirty.set()
+        if self._pending >= self.max_pending:
+            self._full.set()
+
+    async def commit(self) -> None:
+
+        if self.durability != "sync":
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self._dirty.set()
+        await future
+
+    async def flush(self) -> None:
+
+        async with self._lock:
+            self._pending = 0
+            self._dirty.clear()
+            self._full.clear()
+            waiters, self._waiters = self._waiters, []
+            start = time.perf_counter()
+            try:
+                job = self.prepare()
+                if job is not None:
+                    finish = await asyncio.to_thread(job)
+                    if finish is not None:
+                        finish()
+                    self.flushes += 1
+                    self._observe("ok", time.perf_counter() - start)
+            except Exception as e:
+                self._observe("error", time.perf_counter() - start)
+                logger.error(f"Değişiklikler diske yazılamadı: {e}")
+                if not self._stopping:
+                    self.notify()
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(e)
+                return
+
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    async def stop(self) -> None:
+
+        self._stopping = True
+        self._dirty.set()
+        self._full.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def _observe(self, outcome: str, seconds: float) -> None:
+
+        if self.observer is not None:
+            self.observer(outcome, seconds)
+
+    async def _run(self) -> None:
+
+        while not self._stopping:
+            await self._dirty.wait()
+            if not self._stopping:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+            await self.flush()
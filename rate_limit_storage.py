@@ -0,0 +1,111 @@
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from limits.storage import Storage
+
+
+class SQLiteRateLimitStorage(Storage):
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    INCR = """
+        INSERT INTO counters (key, value, expiry) VALUES (?, ?, ?)
+        ON CONFLICT (key) DO UPDATE SET
+            value = CASE WHEN counters.expiry <= ? THEN excluded.value ELSE counters.value + excluded.value END,
+            expiry = CASE WHEN counters.expiry <= ? THEN excluded.expiry ELSE counters.expiry END
+        RETURNING value
+    """
+
+    def __init__(self, uri: Optional[str] = None, wrap_exceptions: bool = False,
+                 sweep_interval: float = 60, **options):
+        self.filename = self._filename(uri)
+        self.sweep_interval = float(sweep_interval)
+        self._next_sweep = 0.0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.filename, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS counters (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL,
+                expiry REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+
+        return sqlite3.Error
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+
+        now = time.time()
+        with self._lock:
+            self._sweep(now)
+            return self._conn.execute(self.INCR, (key, amount, now + expiry, now, now)).fetchone()[0]
+
+    def get(self, key: str) -> int:
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM counters WHERE key = ? AND expiry > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row is not None else 0
+
+    def get_expiry(self, key: str) -> float:
+
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT expiry FROM counters WHERE key = ? AND expiry > ?", (key, now)
+            ).fetchone()
+        return row[0] if row is not None else now
+
+    def check(self) -> bool:
+
+        try:
+            with self._lock:
+                self._conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> Optional[int]:
+
+        with self._lock:
+            return self._conn.execute("DELETE FROM counters").rowcount
+
+    def clear(self, key: str) -> None:
+
+        with self._lock:
+            self._conn.execute("DELETE FROM counters WHERE key = ?", (key,))
+
+    def sweep(self) -> int:
+
+        with self._lock:
+            return self._conn.execute("DELETE FROM counters WHERE expiry <= ?", (time.time(),)).rowcount
+
+    def close(self) -> None:
+
+        with self._lock:
+            self._conn.close()
+
+    def _sweep(self, now: float) -> None:
+
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.sweep_interval
+        self._conn.execute("DELETE FROM counters WHERE expiry <= ?", (now,))
+
+    @staticmethod
+    def _filename(uri: Optional[str]) -> str:
+
+        path = uri.split("://", 1)[1] if uri and "://" in uri else ""
+        if path.startswith("/"):
+            path = path[1:]
+        return path or ":memory:"
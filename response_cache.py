@@ -0,0 +1,73 @@
+import hashlib
+import json
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi import Request, Response, status
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+CachedBody = Tuple[Hashable, bytes, str]
+
+
+def dump_json(content: Any) -> bytes:
+
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def json_response(content: Any, headers: Optional[Dict[str, str]] = None) -> Response:
+
+    return Response(content=dump_json(content), media_type="application/json", headers=headers)
+
+
+def etag_matches(header: Optional[str], etag: str, weak: bool = False) -> bool:
+
+    if header is None:
+        return False
+    candidates = [value.strip() for value in header.split(",")]
+    if weak:
+        candidates = [value.removeprefix("W/") for value in candidates]
+    return "*" in candidates or etag in candidates
+
+
+class ResponseCache:
+
+    def __init__(self):
+        self._entries: Dict[Hashable, CachedBody] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+
+        return len(self._entries)
+
+    def body(self, key: Hashable, generation: Hashable, build: Callable[[], Any]) -> Tuple[bytes, str]:
+
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == generation:
+            self.hits += 1
+            return entry[1], entry[2]
+
+        self.misses += 1
+        body = dump_json(build())
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        self._entries[key] = (generation, body, etag)
+        return body, etag
+
+    def respond(self, request: Request, key: Hashable, generation: Hashable,
+                build: Callable[[], Any]) -> Response:
+
+        body, etag = self.body(key, generation, build)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag, weak=True):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def clear(self) -> None:
+
+        self._entries.clear()
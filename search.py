@@ -0,0 +1,109 @@
+import bisect
+import re
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+
+_DOTTED_I = str.maketrans({"İ": "i", "ı": "i"})
+_TOKEN = re.compile(r"\w+")
+
+
+def fold(text: str) -> str:
+
+    return text.translate(_DOTTED_I).casefold()
+
+
+def tokenize(text: str) -> List[str]:
+
+    return _TOKEN.findall(fold(text))
+
+
+class SearchIndex:
+
+    def __init__(self):
+        self._postings: Dict[str, Set[str]] = {}
+        self._tokens: List[str] = []
+        self._key_tokens: Dict[str, Tuple[str, ...]] = {}
+
+    def __len__(self) -> int:
+
+        return len(self._key_tokens)
+
+    def build(self, items: Iterable[Tuple[str, str]]) -> None:
+
+        self._postings = {}
+        self._key_tokens = {}
+        for key, text in items:
+            tokens = tuple(sys.intern(token) for token in dict.fromkeys(tokenize(text)))
+            self._key_tokens[key] = tokens
+            for token in tokens:
+                self._postings.setdefault(token, set()).add(key)
+        self._tokens = sorted(self._postings)
+
+    def add(self, key: str, text: str) -> None:
+
+        self.remove(key)
+        tokens = tuple(sys.intern(token) for token in dict.fromkeys(tokenize(text)))
+        self._key_tokens[key] = tokens
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = set()
+                bisect.insort(self._tokens, token)
+            postings.add(key)
+
+    def remove(self, key: str) -> None:
+
+        for token in self._key_tokens.pop(key, ()):
+            postings = self._postings[token]
+            postings.discard(key)
+            if not postings:
+                del self._postings[token]
+                del self._tokens[bisect.bisect_left(self._tokens, token)]
+
+    def search(self, query: str, limit: int = 20) -> List[str]:
+
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        first = next(iter(terms))
+        if len(terms) > 1:
+            costs: Dict[str, int] = {}
+            for term in sorted(terms, key=len, reverse=True):
+                costs[term] = self._cost(term, min(costs.values(), default=None))
+            first = min(costs, key=costs.get)
+            if costs[first] == 0:
+                return []
+
+        rest = [term for term in terms if term != first]
+        results: List[str] = []
+        seen: Set[str] = set()
+        for token in self._prefix_range(first):
+            for key in self._postings[token]:
+                if key in seen:
+                    continue
+                seen.add(key)
+                tokens = self._key_tokens[key]
+                if all(any(token.startswith(term) for token in tokens) for term in rest):
+                    results.append(key)
+                    if len(results) >= limit:
+                        return results
+        return results
+
+    def _cost(self, prefix: str, budget: Optional[int]) -> int:
+
+        cost = 0
+        for token in self._prefix_range(prefix):
+            cost += len(self._postings[token])
+            if budget is not None and cost > budget:
+                break
+        return cost
+
+    def _prefix_range(self, prefix: str) -> Iterator[str]:
+
+        for i in range(bisect.bisect_left(self._tokens, prefix), len(self._tokens)):
+            token = self._tokens[i]
+            if not token.startswith(prefix):
+                return
+            yield token
@@ -0,0 +1,71 @@
+import bisect
+import itertools
+from typing import Iterable, Iterator, List, Optional
+
+
+class SortedKeys:
+
+    def __init__(self, keys: Iterable[str] = (), load: int = 1000):
+        self.load = load
+        keys = sorted(keys)
+        self._buckets: List[List[str]] = [keys[i:i + load] for i in range(0, len(keys), load)]
+        self._maxes: List[str] = [bucket[-1] for bucket in self._buckets]
+        self._len = len(keys)
+
+    def __len__(self) -> int:
+
+        return self._len
+
+    def __iter__(self) -> Iterator[str]:
+
+        return self.after(None)
+
+    def add(self, key: str) -> None:
+
+        if not self._buckets:
+            self._buckets.append([key])
+            self._maxes.append(key)
+            self._len += 1
+            return
+
+        i = bisect.bisect_left(self._maxes, key)
+        if i == len(self._buckets):
+            i -= 1
+            self._buckets[i].append(key)
+            self._maxes[i] = key
+        else:
+            bisect.insort(self._buckets[i], key)
+        self._len += 1
+
+        bucket = self._buckets[i]
+        if len(bucket) > 2 * self.load:
+            half = len(bucket) // 2
+            self._buckets[i:i + 1] = [bucket[:half], bucket[half:]]
+            self._maxes[i:i + 1] = [bucket[half - 1], bucket[-1]]
+
+    def remove(self, key: str) -> None:
+
+        i = bisect.bisect_left(self._maxes, key)
+        if i == len(self._buckets):
+            raise KeyError(key)
+        bucket = self._buckets[i]
+        j = bisect.bisect_left(bucket, key)
+        if j == len(bucket) or bucket[j] != key:
+            raise KeyError(key)
+
+        del bucket[j]
+        self._len -= 1
+        if bucket:
+            self._maxes[i] = bucket[-1]
+        else:
+            del self._buckets[i]
+            del self._maxes[i]
+
+    def after(self, key: Optional[str]) -> Iterator[str]:
+
+        i = bisect.bisect_right(self._maxes, key) if key is not None else 0
+        start = bisect.bisect_right(self._buckets[i], key) if key is not None and i < len(self._buckets) else 0
+        while i < len(self._buckets):
+            yield from itertools.islice(self._buckets[i], start, None)
+            i += 1
+            start = 0
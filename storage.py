@@ -0,0 +1,488 @@
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+from array import array
+from contextlib import contextmanager
+from itertools import accumulate
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, TextIO, Tuple, TypeVar
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+INDEX_KEY_SIZE = 32
+_INDEX_MAGIC = b"LIBIDX01"
+_INDEX_HEADER = struct.Struct("<8sQQQ")
+_INDEX_RECORD = struct.Struct(f"<{INDEX_KEY_SIZE}sQI")
+_STRING = r'"[^"\\]*(?:\\.[^"\\]*)*"'
+_SNAPSHOT_RECORD = re.compile((
+    r'\n  \{\n    "title": ' + _STRING + r',\n    "author": ' + _STRING
+    + r',\n    "isbn": (' + _STRING + r')\n  \}'
+).encode())
+_SNAPSHOT_OBJECT_START = re.compile(rb'\n  \{')
+_encode_string = json.JSONEncoder(ensure_ascii=False).encode
+
+_BINARY_MAGIC = b"LIBBIN01"
+_BINARY_HEADER = struct.Struct("<8sIIII")
+_BINARY_LENGTHS = 1
+
+IndexEntry = Tuple[bytes, int, int]
+SnapshotRecord = Tuple[str, str, str]
+
+CORRUPT_SNAPSHOT_ERRORS = (ValueError, KeyError, TypeError, UnicodeDecodeError)
+
+
+def write_snapshot(filename: str, books_data: List[dict], fsync: bool = True,
+                   index_filename: Optional[str] = None) -> None:
+
+    entries = _atomic_write(filename, lambda file: _dump_snapshot(file, books_data), fsync)
+    if index_filename is None:
+        return
+    if not _write_index(filename, index_filename, entries, fsync):
+        remove_quietly(index_filename)
+
+
+def write_binary_snapshot(filename: str, records: List[SnapshotRecord], fsync: bool = True) -> None:
+
+    _atomic_write(filename, lambda file: file.write(encode_binary_snapshot(records)), fsync)
+
+
+def read_snapshot(filename: str) -> List[SnapshotRecord]:
+
+    with open(filename, 'rb') as file:
+        data = file.read()
+    if is_binary_snapshot(data):
+        return decode_binary_snapshot(data)
+    return [(book_data["title"], book_data["author"], book_data["isbn"]) for book_data in json.loads(data)]
+
+
+def is_binary_snapshot(data: bytes) -> bool:
+
+    return data[:len(_BINARY_MAGIC)] == _BINARY_MAGIC
+
+
+def encode_binary_snapshot(records: List[SnapshotRecord]) -> bytes:
+
+    strings: Dict[str, int] = {}
+    fields = array('I', [strings.setdefault(value, len(strings)) for record in records for value in record])
+    if any("\0" in value for value in strings):
+        flags, lengths = _BINARY_LENGTHS, array('I', map(len, strings))
+    else:
+        flags, lengths = 0, array('I')
+    blob = ("" if flags else "\0").join(strings).encode('utf-8', 'surrogatepass')
+    if sys.byteorder != 'little':
+        fields.byteswap()
+        lengths.byteswap()
+    header = _BINARY_HEADER.pack(_BINARY_MAGIC, flags, len(records), len(strings), len(blob))
+    return b"".join((header, lengths.tobytes(), blob, fields.tobytes()))
+
+
+def decode_binary_snapshot(data: bytes) -> List[SnapshotRecord]:
+
+    try:
+        magic, flags, count, string_count, blob_size = _BINARY_HEADER.unpack_from(data, 0)
+    except struct.error:
+        raise ValueError("ikili snapshot başlığı eksik")
+    lengths_end = _BINARY_HEADER.size + (string_count * 4 if flags & _BINARY_LENGTHS else 0)
+    blob_end = lengths_end + blob_size
+    if magic != _BINARY_MAGIC or len(data) != blob_end + count * 12:
+        raise ValueError("ikili snapshot bozuk")
+
+    text = data[lengths_end:blob_end].decode('utf-8', 'surrogatepass')
+    if flags & _BINARY_LENGTHS:
+        lengths = array('I', data[_BINARY_HEADER.size:lengths_end])
+        if sys.byteorder != 'little':
+            lengths.byteswap()
+        ends = list(accumulate(lengths))
+        strings = [text[start:end] for start, end in zip([0] + ends, ends)]
+    else:
+        strings = text.split("\0") if string_count else []
+    if len(strings) != string_count or sum(map(len, strings)) + (0 if flags else max(string_count - 1, 0)) != len(text):
+        raise ValueError("ikili snapshot bozuk")
+
+    fields = array('I', data[blob_end:])
+    if sys.byteorder != 'little':
+        fields.byteswap()
+    try:
+        values = list(map(strings.__getitem__, fields))
+    except IndexError:
+        raise ValueError("ikili snapshot bozuk")
+    return list(zip(*[iter(values)] * 3))
+
+
+def build_index(filename: str, index_filename: str) -> bool:
+
+    with open(filename, 'rb') as file:
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return False
+        try:
+            entries = [
+                (json.loads(match.group(1)).encode('utf-8'), match.start() + 3, match.end() - match.start() - 3)
+                for match in _SNAPSHOT_RECORD.finditer(data)
+            ]
+            if not entries and data[:].strip() != b"[]":
+                return False
+            if len(entries) != sum(1 for _ in _SNAPSHOT_OBJECT_START.finditer(data)):
+                return False
+        finally:
+            data.close()
+    return _write_index(filename, index_filename, entries, fsync=False)
+
+
+def quarantine(filename: str) -> str:
+
+    target = filename + ".corrupt"
+    os.replace(filename, target)
+    return target
+
+
+def remove_quietly(filename: str) -> None:
+
+    try:
+        os.remove(filename)
+    except OSError:
+        pass
+
+
+class SnapshotIndex:
+
+    def __init__(self, filename: str, index_filename: str):
+        self._files: List[BinaryIO] = []
+        self._maps: List[mmap.mmap] = []
+        try:
+            self._snapshot = self._map(filename)
+            self._index = self._map(index_filename)
+            magic, self.count, size, mtime_ns = _INDEX_HEADER.unpack_from(self._index, 0)
+            stat = os.stat(filename)
+        except (OSError, ValueError, struct.error):
+            self.close()
+            raise ValueError(f"{index_filename} kullanılamıyor")
+
+        expected = _INDEX_HEADER.size + self.count * _INDEX_RECORD.size
+        if (magic, size, mtime_ns, len(self._index)) != (_INDEX_MAGIC, stat.st_size, stat.st_mtime_ns, expected):
+            self.close()
+            raise ValueError(f"{index_filename} {filename} ile uyuşmuyor")
+
+    def __len__(self) -> int:
+
+        return self.count
+
+    def key(self, position: int) -> str:
+
+        return self._record(position)[0].rstrip(b"\0").decode('utf-8')
+
+    def bisect_left(self, isbn: str) -> int:
+
+        target = _index_key(isbn)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._record(middle)[0] < target:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def bisect_right(self, isbn: str) -> int:
+
+        target = _index_key(isbn)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if target < self._record(middle)[0]:
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def find(self, isbn: str) -> Optional[int]:
+
+        if len(isbn.encode('utf-8')) > INDEX_KEY_SIZE:
+            return None
+        position = self.bisect_left(isbn)
+        if position < self.count and self.key(position) == isbn:
+            return position
+        return None
+
+    def read(self, position: int) -> dict:
+
+        _, offset, length = self._record(position)
+        return json.loads(self._snapshot[offset:offset + length])
+
+    def read_all(self) -> List[dict]:
+
+        return json.loads(self._snapshot[:])
+
+    def close(self) -> None:
+
+        for data in self._maps:
+            data.close()
+        for file in self._files:
+            file.close()
+        self._maps = []
+        self._files = []
+
+    def _record(self, position: int) -> Tuple[bytes, int, int]:
+
+        return _INDEX_RECORD.unpack_from(self._index, _INDEX_HEADER.size + position * _INDEX_RECORD.size)
+
+    def _map(self, filename: str) -> mmap.mmap:
+
+        file = open(filename, 'rb')
+        self._files.append(file)
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(data)
+        return data
+
+
+def _index_key(isbn: str) -> bytes:
+
+    return isbn.encode('utf-8').ljust(INDEX_KEY_SIZE, b"\0")
+
+
+def _dump_snapshot(file: BinaryIO, books_data: List[dict]) -> List[IndexEntry]:
+
+    if not books_data:
+        file.write(b"[]")
+        return []
+
+    entries = []
+    position = file.write(b"[\n")
+    for i, book_data in enumerate(books_data):
+        if i:
+            position += file.write(b",\n")
+        record = _format_record(book_data).encode('utf-8')
+        entries.append((str(book_data.get("isbn", "")).encode('utf-8'), position, len(record)))
+        position += file.write(record)
+    file.write(b"\n]")
+    return entries
+
+
+def _format_record(book_data: dict) -> str:
+
+    if list(book_data) == ["title", "author", "isbn"]:
+        return (
+            '  {\n    "title": ' + _encode_string(book_data["title"])
+            + ',\n    "author": ' + _encode_string(book_data["author"])
+            + ',\n    "isbn": ' + _encode_string(book_data["isbn"]) + '\n  }'
+        )
+    return "  " + json.dumps(book_data, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+
+
+def _write_index(filename: str, index_filename: str, entries: List[IndexEntry], fsync: bool) -> bool:
+
+    if any(len(key) > INDEX_KEY_SIZE for key, _, _ in entries):
+        return False
+
+    entries = sorted(entries)
+    stat = os.stat(filename)
+    header = _INDEX_HEADER.pack(_INDEX_MAGIC, len(entries), stat.st_size, stat.st_mtime_ns)
+    records = b"".join(_INDEX_RECORD.pack(key, offset, length) for key, offset, length in entries)
+    _atomic_write(index_filename, lambda file: file.write(header + records), fsync)
+    return True
+
+
+def _atomic_write(filename: str, write: Callable[[BinaryIO], T], fsync: bool) -> T:
+
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(filename) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            result = write(file)
+            file.flush()
+            if fsync:
+                os.fsync(file.fileno())
+        os.chmod(tmp_path, _file_mode(filename))
+        os.replace(tmp_path, filename)
+    except BaseException:
+        remove_quietly(tmp_path)
+        raise
+
+    if fsync:
+        _fsync_directory(directory)
+    return result
+
+
+def _file_mode(filename: str) -> int:
+
+    try:
+        return os.stat(filename).st_mode & 0o777
+    except FileNotFoundError:
+        return 0o644
+
+
+def _fsync_directory(directory: str) -> None:
+
+    if os.name == 'nt':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class Journal:
+
+    def __init__(self, filename: str, fsync_every: int = 1):
+        self.filename = filename
+        self.fsync_every = fsync_every
+        self.entries = 0
+        self.offset = 0
+        self._unsynced = 0
+        self._file: Optional[TextIO] = None
+
+    def append(self, entry: dict) -> None:
+
+        self.append_many([entry])
+
+    def append_many(self, entries: List[dict]) -> None:
+
+        if self._file is None:
+            self._file = open(self.filename, 'a', encoding='utf-8')
+            if self._file.tell() > 0 and not self._ends_with_newline():
+                self._file.write("\n")
+        self._file.write("".join(
+            json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + "\n" for entry in entries
+        ))
+        self._file.flush()
+        self.offset = os.fstat(self._file.fileno()).st_size
+        self.entries += len(entries)
+        self._unsynced += len(entries)
+        if self.fsync_every and self._unsynced >= self.fsync_every:
+            self.sync()
+
+    def sync(self) -> None:
+
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def replay(self) -> Iterator[dict]:
+
+        self.entries = 0
+        self.offset = 0
+        try:
+            with open(self.filename, 'rb') as file:
+                data = file.read()
+        except FileNotFoundError:
+            return
+        self.offset = len(data)
+        yield from self._parse(data)
+
+    def tail(self) -> Optional[List[dict]]:
+
+        try:
+            size = os.path.getsize(self.filename)
+        except FileNotFoundError:
+            size = 0
+        if size < self.offset:
+            return None
+        if size == self.offset:
+            return []
+
+        with open(self.filename, 'rb') as file:
+            file.seek(self.offset)
+            data = file.read(size - self.offset)
+        end = data.rfind(b"\n") + 1
+        self.offset += end
+        return list(self._parse(data[:end]))
+
+    def _parse(self, data: bytes) -> Iterator[dict]:
+
+        for line in data.decode('utf-8', 'replace').splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"{self.filename} içinde bozuk kayit atlandi")
+                continue
+            self.entries += 1
+            yield entry
+
+    def _ends_with_newline(self) -> bool:
+
+        with open(self.filename, 'rb') as file:
+            file.seek(-1, 2)
+            return file.read(1) == b"\n"
+
+    def truncate(self) -> None:
+
+        self.close()
+        with open(self.filename, 'w', encoding='utf-8') as file:
+            file.flush()
+            os.fsync(file.fileno())
+        self.entries = 0
+        self.offset = 0
+
+    def close(self) -> None:
+
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+
+class FileLock:
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self._file: Optional[BinaryIO] = None
+
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+
+        self.acquire(shared=False)
+        try:
+            yield
+        finally:
+            self.release()
+
+    @contextmanager
+    def shared(self) -> Iterator[None]:
+
+        self.acquire(shared=True)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def close(self) -> None:
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def acquire(self, shared: bool) -> None:
+
+        if self._file is None:
+            self._file = open(self.filename, 'a+b')
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+
+    def release(self) -> None:
+
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
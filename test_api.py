@@ -1,29 +1,69 @@
 import pytest
+import asyncio
 import json
+import multiprocessing
 import os
+import threading
 from fastapi.testclient import TestClient
 from unittest.mock import patch, AsyncMock
 import httpx
 
 
-from api import app, Library, Book
+from api import app, Library, LazyLibrary, SQLiteLibrary, Book
+from concurrency import BackendCall, CircuitOpenError
+from convert_snapshot import convert
+from metadata_cache import MetadataCache
+from metrics import MetricsRegistry, instrument_backend, timing_observer
+from persistence import PersistenceWorker
+from sorted_keys import SortedKeys
+from storage import FileLock, write_snapshot
 
 
 client = TestClient(app)
 
 
 TEST_LIBRARY_FILE = "test_library.json"
+TEST_DB_FILE = "test_library.db"
+TEST_CACHE_FILE = "test_cache.db"
+TEST_FILES = [TEST_LIBRARY_FILE, TEST_LIBRARY_FILE + ".journal", TEST_LIBRARY_FILE + ".corrupt",
+              TEST_LIBRARY_FILE + ".idx", TEST_LIBRARY_FILE + ".bin", TEST_LIBRARY_FILE + ".lock",
+              TEST_DB_FILE, TEST_DB_FILE + "-wal", TEST_DB_FILE + "-shm",
+              TEST_CACHE_FILE, TEST_CACHE_FILE + "-wal", TEST_CACHE_FILE + "-shm"]
 
 @pytest.fixture(autouse=True)
 def setup_and_teardown():
-    if os.path.exists(TEST_LIBRARY_FILE):
-        os.remove(TEST_LIBRARY_FILE)
+    for path in TEST_FILES:
+        if os.path.exists(path):
+            os.remove(path)
     
     yield 
     
    
-    if os.path.exists(TEST_LIBRARY_FILE):
-        os.remove(TEST_LIBRARY_FILE)
+    for path in TEST_FILES:
+        if os.path.exists(path):
+            os.remove(path)
+
+def mock_openlibrary(handler):
+    transport = httpx.MockTransport(handler)
+    real_client = httpx.AsyncClient
+    return patch('httpx.AsyncClient', lambda *args, **kwargs: real_client(transport=transport))
+
+def openlibrary_handler(calls):
+    def handler(request):
+        calls.append(request.url.path)
+        if request.url.path == "/isbn/9780743273565.json":
+            return httpx.Response(200, json={"title": "The Great Gatsby",
+                                             "authors": [{"key": "/authors/OL26783A"}]})
+        if request.url.path == "/authors/OL26783A.json":
+            return httpx.Response(200, json={"name": "F. Scott Fitzgerald"})
+        return httpx.Response(404)
+    return handler
+
+def add_books_in_process(worker):
+    library = Library(TEST_LIBRARY_FILE, journal=True, compact_every=7, shared=True)
+    for i in range(20):
+        library.add_book(Book(f"Kitap {worker}-{i}", f"Yazar {worker}", f"{worker}{i:09d}"))
+    library.close()
 
 @pytest.fixture
 def sample_library():
@@ -77,6 +117,111 @@ class TestAPIEndpoints:
         assert data[0]["author"] == "Test Yazar"
         assert data[0]["isbn"] == "1234567890"
 
+    def test_get_books_keyset_pagination(self, sample_library):
+
+        with patch('api.library', sample_library):
+            response = client.get("/books", params={"limit": 1})
+            assert response.status_code == 200
+            assert [book["isbn"] for book in response.json()] == ["0987654321"]
+            cursor = response.headers["X-Next-Cursor"]
+
+            response = client.get("/books", params={"limit": 1, "cursor": cursor})
+            assert [book["isbn"] for book in response.json()] == ["1234567890"]
+
+            response = client.get("/books", params={"limit": 1, "cursor": "1234567890"})
+            assert response.json() == []
+            assert "X-Next-Cursor" not in response.headers
+
+    def test_get_books_etag(self, sample_library):
+
+        with patch('api.library', sample_library):
+            response = client.get("/books")
+            etag = response.headers["ETag"]
+            assert len(response.json()) == 2
+            assert client.get("/books", headers={"If-None-Match": etag}).status_code == 304
+
+            sample_library.add_book(Book("Test Kitap 3", "Test Yazar 3", "1111111111"))
+            response = client.get("/books", headers={"If-None-Match": etag})
+            assert response.status_code == 200
+            assert len(response.json()) == 3
+            assert response.headers["ETag"] != etag
+
+    def test_get_books_etag_per_library(self):
+
+        first = Library(TEST_LIBRARY_FILE)
+        second = Library(TEST_LIBRARY_FILE + ".bin")
+        first.add_book(Book("Kitap 1", "Yazar 1", "1111111111"))
+        second.add_book(Book("Kitap 2", "Yazar 2", "2222222222"))
+
+        assert first.generation != second.generation
+        with patch('api.library', first):
+            assert [book["isbn"] for book in client.get("/books").json()] == ["1111111111"]
+        with patch('api.library', second):
+            assert [book["isbn"] for book in client.get("/books").json()] == ["2222222222"]
+
+    def test_stream_books(self, sample_library):
+
+        with patch('api.library', sample_library):
+            response = client.get("/books/stream")
+            assert response.status_code == 200
+            assert response.headers["content-type"] == "application/x-ndjson"
+            lines = [json.loads(line) for line in response.text.splitlines()]
+            assert [book["isbn"] for book in lines] == ["0987654321", "1234567890"]
+
+    def test_bulk_import(self):
+
+        calls = []
+        library = Library(TEST_LIBRARY_FILE, journal=True)
+        library.add_book(Book("Mevcut", "Yazar", "1234567890"))
+
+        with patch('api.library', library), mock_openlibrary(openlibrary_handler(calls)):
+            response = client.post("/books/bulk", json=["978-0743273565", "1234567890", "9999999999", "9780743273565"])
+
+        assert response.status_code == 200
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        statuses = {line["isbn"]: line["status"] for line in lines[:-1]}
+        assert statuses == {"9780743273565": "ok", "1234567890": "exists", "9999999999": "error"}
+        assert lines[-1]["summary"] == {"requested": 3, "added": 1, "exists": 1, "failed": 1}
+        assert calls.count("/isbn/9780743273565.json") == 1
+        assert library.journal.entries == 2
+        library.close()
+
+    def test_bulk_import_text_body(self, sample_library):
+
+        with patch('api.library', sample_library):
+            response = client.post("/books/bulk", content="1234567890\n0987654321\n",
+                                   headers={"content-type": "text/plain"})
+            assert response.status_code == 200
+            lines = [json.loads(line) for line in response.text.splitlines()]
+            assert lines[-1]["summary"]["exists"] == 2
+
+            assert client.post("/books/bulk", json=[]).status_code == 400
+            assert client.post("/books/bulk", json={"isbns": [1, 2]}).status_code == 400
+            assert client.post("/books/bulk", json=["1234567890", "../authors/OL1A"]).status_code == 400
+            assert client.post("/books/bulk", json=["12345"]).status_code == 400
+
+    def test_bulk_import_file_upload(self):
+
+        calls = []
+        library = Library(TEST_LIBRARY_FILE)
+
+        with patch('api.library', library), mock_openlibrary(openlibrary_handler(calls)):
+            response = client.post("/books/bulk", files={"file": ("isbns.txt", b"978-0743273565\n", "text/plain")})
+
+        assert response.status_code == 200
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines[-1]["summary"] == {"requested": 1, "added": 1, "exists": 0, "failed": 0}
+        assert calls == ["/isbn/9780743273565.json", "/authors/OL26783A.json"]
+
+    def test_search_books_endpoint(self, sample_library):
+
+        with patch('api.library', sample_library):
+            response = client.get("/books/search", params={"q": "kitap 2"})
+            assert response.status_code == 200
+            assert [book["isbn"] for book in response.json()] == ["0987654321"]
+
+            assert client.get("/books/search", params={"q": ""}).status_code == 422
+
     @pytest.mark.asyncio
     async def test_add_book_success(self):
         
@@ -159,6 +304,7 @@ class TestAPIEndpoints:
         mock_book = Book("Test Kitap", "Test Yazar", "1234567890")
         mock_library.find_book.return_value = mock_book
         mock_library.remove_book.return_value = True
+        mock_library.persisted = AsyncMock()
         
         response = client.delete("/books/1234567890")
         assert response.status_code == 200
@@ -178,12 +324,8 @@ class TestAPIEndpoints:
     @patch('api.library')
     def test_get_stats(self, mock_library):
         
-        mock_books = [
-            Book("Kitap 1", "Yazar A", "1111111111"),
-            Book("Kitap 2", "Yazar A", "2222222222"),
-            Book("Kitap 3", "Yazar B", "3333333333")
-        ]
-        mock_library.list_books.return_value = mock_books
+        mock_library.__len__.return_value = 3
+        mock_library.author_counts.return_value = {"Yazar A": 2, "Yazar B": 1}
         
         response = client.get("/stats")
         assert response.status_code == 200
@@ -191,6 +333,29 @@ class TestAPIEndpoints:
         assert data["total_books"] == 3
         assert data["total_authors"] == 2
         assert "books_by_author" in data
+        assert data["books_by_author"] == {"Yazar A": 2, "Yazar B": 1}
+
+    def test_get_stats_top_and_pagination(self):
+
+        library = Library(TEST_LIBRARY_FILE)
+        for i, author in enumerate(["Yazar A", "Yazar B", "Yazar B", "Yazar C", "Yazar C", "Yazar C"]):
+            library.add_book(Book(f"Kitap {i}", author, f"{i:010d}"))
+
+        with patch('api.library', library):
+            data = client.get("/stats", params={"top": 2}).json()
+            assert data["books_by_author"] == {"Yazar C": 3, "Yazar B": 2}
+            assert data["total_authors"] == 3
+
+            data = client.get("/stats", params={"offset": 1, "limit": 1}).json()
+            assert data["books_by_author"] == {"Yazar B": 2}
+            assert data["total_books"] == 6
+
+            library.remove_book("0000000000")
+            library.add_book(Book("Kitap 6", "Yazar A", "0000000006"))
+            pages = [client.get("/stats", params={"offset": offset, "limit": 2}).json()["books_by_author"]
+                     for offset in (0, 2)]
+            assert pages == [{"Yazar A": 1, "Yazar B": 2}, {"Yazar C": 3}]
+            assert list(client.get("/stats", params={"offset": 1}).json()["books_by_author"]) == ["Yazar B", "Yazar C"]
 
 
 class TestLibraryClass:
@@ -263,6 +428,840 @@ class TestLibraryClass:
         assert len(books) == 2
         assert isinstance(books, list)
 
+    def test_isbn_index_after_reload(self):
+
+        library = Library(TEST_LIBRARY_FILE)
+        library.add_book(Book("Kitap 1", "Yazar 1", "1111111111"))
+        library.add_book(Book("Kitap 2", "Yazar 2", "2222222222"))
+        library.remove_book("1111111111")
+
+        reloaded = Library(TEST_LIBRARY_FILE)
+        assert len(reloaded) == 1
+        assert "2222222222" in reloaded
+        assert reloaded.find_book("1111111111") is None
+
+        with pytest.raises(ValueError):
+            reloaded.add_book(Book("Kitap 3", "Yazar 3", "2222222222"))
+
+    def test_author_counts(self):
+
+        library = Library(TEST_LIBRARY_FILE)
+        library.add_book(Book("Kitap 1", "Yazar A", "1111111111"))
+        library.add_book(Book("Kitap 2", "Yazar A", "2222222222"))
+        library.add_book(Book("Kitap 3", "Yazar B", "3333333333"))
+        library.remove_book("3333333333")
+
+        assert library.author_counts() == {"Yazar A": 2}
+        assert Library(TEST_LIBRARY_FILE).author_counts() == {"Yazar A": 2}
+
+    def test_search_books(self):
+
+        library = Library(TEST_LIBRARY_FILE)
+        library.add_book(Book("İnce Memed", "Yaşar Kemal", "1111111111"))
+        library.add_book(Book("Kürk Mantolu Madonna", "Sabahattin Ali", "2222222222"))
+        library.add_book(Book("Ince Tales", "Someone Else", "3333333333"))
+
+        assert {book.isbn for book in library.search_books("ince")} == {"1111111111", "3333333333"}
+        assert [book.isbn for book in library.search_books("İNCE mem")] == ["1111111111"]
+        assert [book.isbn for book in library.search_books("yaşar")] == ["1111111111"]
+        assert [book.isbn for book in library.search_books("kürk sabah")] == ["2222222222"]
+        assert library.search_books("kurk") == []
+        assert len(library.search_books("i", limit=1)) == 1
+
+        library.remove_book("1111111111")
+        assert [book.isbn for book in library.search_books("ince")] == ["3333333333"]
+        reloaded = Library(TEST_LIBRARY_FILE)
+        assert reloaded._search is None
+        assert [book.isbn for book in reloaded.search_books("madonna")] == ["2222222222"]
+
+    def test_search_drives_from_selective_term(self):
+
+        library = Library(TEST_LIBRARY_FILE)
+        library.add_books(Book(f"Kitap {i}", f"Yazar {i % 50}", f"{9780000000000 + i}") for i in range(1000))
+
+        assert {book.isbn for book in library.search_books("yazar 17 kitap", limit=100)} == \
+            {f"{9780000000000 + i}" for i in range(1000) if str(i).startswith("17") or i % 50 == 17}
+        assert library.search_books("yazar yok") == []
+
+    def test_journal_replay(self):
+
+        library = Library(TEST_LIBRARY_FILE, journal=True)
+        library.add_book(Book("Kitap 1", "Yazar 1", "1111111111"))
+        library.add_book(Book("Kitap 2", "Yazar 2", "2222222222"))
+        library.remove_book("1111111111")
+        library.close()
+
+        assert not os.path.exists(TEST_LIBRARY_FILE)
+        reloaded = Library(TEST_LIBRARY_FILE, journal=True)
+        assert [book.isbn for book in reloaded.books] == ["2222222222"]
+        reloaded.close()
+
+    def test_journal_compaction(self):
+
+        library = Library(TEST_LIBRARY_FILE, journal=True, compact_every=2)
+        library.add_book(Book("Kitap 1", "Yazar 1", "1111111111"))
+        library.add_book(Book("Kitap 2", "Yazar 2", "2222222222"))
+        assert library.journal.entries == 0
+        library.add_book(Book("Kitap 3", "Yazar 3", "3333333333"))
+        library.close()
+
+        with open(TEST_LIBRARY_FILE, encoding="utf-8") as file:
+            assert len(json.load(file)) == 2
+        assert len(Library(TEST_LIBRARY_FILE, journal=True)) == 3
+
+    def test_snapshot_is_replaced_atomically(self):
+
+        library = Library(TEST_LIBRARY_FILE)
+        library.add_book(Book("Kitap 1", "Yazar 1", "1111111111"))
+
+        with patch("storage._dump_snapshot", side_effect=RuntimeError("disk dolu")):
+            with pytest.raises(RuntimeError):
+                library.add_book(Book("Kitap 2", "Yazar 2", "2222222222"))
+
+        assert [book.isbn for book in Library(TEST_LIBRARY_FILE).books] == ["1111111111"]
+        assert not [name for name in os.listdir(".") if name.endswith(".tmp")]
+
+    def test_corrupt_snapshot_is_kept(self):
+
+        with open(TEST_LIBRARY_FILE, "w", encoding="utf-8") as file:
+            file.write('[{"title": "Kitap 1", "au')
+
+        library = Library(TEST_LIBRARY_FILE)
+        assert len(library) == 0
+        assert os.path.exists(TEST_LIBRARY_FILE + ".corrupt")
+
+    def test_unreadable_snapshot_is_not_quarantined(self):
+
+        Library(TEST_LIBRARY_FILE).add_book(Book("Kitap 1", "Yazar 1", "1111111111"))
+
+        with patch("api.read_snapshot", side_effect=OSError(24, "Too many open files")):
+            with pytest.raises(OSError):
+                Library(TEST_LIBRARY_FILE)
+        assert not os.path.exists(TEST_LIBRARY_FILE + ".corrupt")
+        assert len(Library(TEST_LIBRARY_FILE)) == 1
+
+    @pytest.mark.parametrize("library_class", [Library, LazyLibrary])
+    def test_invalid_record_is_kept(self, library_class):
+
+        with open(TEST_LIBRARY_FILE, "w", encoding="utf-8") as file:
+            json.dump([{"title": "Kitap 1", "author": "Yazar 1", "isbn": "1111111111"},
+                       {"title": "Kitap 2", "author": "Yazar 2"}], file)
+
+        library = library_class(TEST_LIBRARY_FILE)
+        assert len(library) == 0
+        library.add_book(Book("Kitap 3", "Yazar 3", "3333333333"))
+        with open(TEST_LIBRARY_FILE + ".corrupt", encoding="utf-8") as file:
+            assert len(json.load(file)) == 2
+        library.close()
+
+    def test_binary_snapshot_round_trip(self):
+
+        library = Library(TEST_LIBRARY_FILE, snapshot_format="binary")
+        library.add_books([Book("Kitap 1", "Yazar Ş", "1111111111"), Book("Kitap 2", "Yazar Ş", "2222222222")])
+
+        with open(TEST_LIBRARY_FILE, "rb") as file:
+            assert file.read(8) == b"LIBBIN01"
+        reloaded = Library(TEST_LIBRARY_FILE)
+        assert [(book.title, book.author) for book in reloaded.books] == [("Kitap 1", "Yazar Ş"), ("Kitap 2", "Yazar Ş")]
+        assert reloaded.books[0].author is reloaded.books[1].author
+
+    def test_snapshot_conversion(self):
+
+        Library(TEST_LIBRARY_FILE).add_book(Book("Kitap 1", "Yazar 1", "1111111111"))
+
+        assert convert(TEST_LIBRARY_FILE, TEST_LIBRARY_FILE + ".bin", "binary") == 1
+        assert convert(TEST_LIBRARY_FILE + ".bin", TEST_LIBRARY_FILE, "json") == 1
+        assert [book.isbn for book in Library(TEST_LIBRARY_FILE + ".bin").books] == ["1111111111"]
+        assert [book.isbn for book in Library(TEST_LIBRARY_FILE).books] == ["1111111111"]
+
+    def test_corrupt_binary_snapshot_is_kept(self):
+
+        Library(TEST_LIBRARY_FILE, snapshot_format="binary").add_book(Book("Kitap 1", "Yazar 1", "1111111111"))
+        with open(TEST_LIBRARY_FILE, "r+b") as file:
+            file.truncate(30)
+
+        assert len(Library(TEST_LIBRARY_FILE, snapshot_format="binary")) == 0
+        assert os.path.exists(TEST_LIBRARY_FILE + ".corrupt")
+
+class TestSortedKeys:
+
+    def test_matches_sorted_list(self):
+
+        keys = SortedKeys((f"{i:05d}" for i in range(0, 200, 2)), load=4)
+        expected = sorted(f"{i:05d}" for i in range(0, 200, 2))
+        for i in range(1, 200, 6):
+            keys.add(f"{i:05d}")
+            expected.append(f"{i:05d}")
+        for i in range(0, 200, 8):
+            keys.remove(f"{i:05d}")
+            expected.remove(f"{i:05d}")
+        expected.sort()
+
+        assert len(keys) == len(expected)
+        assert list(keys) == expected
+        assert list(keys.after("00100"))[:3] == [key for key in expected if key > "00100"][:3]
+        assert list(keys.after("99999")) == []
+        with pytest.raises(KeyError):
+            keys.remove("00000")
+
+
+class TestLazyLibrary:
+
+    def test_books_materialized_on_access(self):
+
+        Library(TEST_LIBRARY_FILE).add_books([Book(f"Kitap {i}", f"Yazar {i % 2}", f"{1000000000 + i}") for i in range(5)])
+
+        library = LazyLibrary(TEST_LIBRARY_FILE)
+        assert os.path.exists(TEST_LIBRARY_FILE + ".idx")
+        assert len(library) == 5
+        assert library._cache == {}
+        assert library.find_book("1000000003").title == "Kitap 3"
+        assert list(library._cache) == ["1000000003"]
+        assert library.find_book("9999999999") is None
+        assert [book.isbn for book in library.page_books("1000000001", 2)] == ["1000000002", "1000000003"]
+        library.close()
+
+    def test_cache_is_bounded(self):
+
+        Library(TEST_LIBRARY_FILE).add_books([Book(f"Kitap {i}", "Yazar", f"{1000000000 + i}") for i in range(50)])
+
+        library = LazyLibrary(TEST_LIBRARY_FILE, cache_size=3)
+        assert len(list(library.iter_books(batch_size=7))) == 50
+        assert len(library._cache) == 0
+        for isbn in ("1000000001", "1000000002", "1000000003", "1000000001", "1000000004"):
+            library.find_book(isbn)
+        assert list(library._cache) == ["1000000003", "1000000001", "1000000004"]
+        library.close()
+
+    def test_author_counts_skip_search_index(self):
+
+        Library(TEST_LIBRARY_FILE).add_books([Book(f"Kitap {i}", f"Yazar {i % 2}", f"{1000000000 + i}") for i in range(5)])
+
+        library = LazyLibrary(TEST_LIBRARY_FILE)
+        library.remove_book("1000000000")
+        library.add_book(Book("Kitap 5", "Yazar 2", "1000000005"))
+        assert library.author_counts() == {"Yazar 0": 2, "Yazar 1": 2, "Yazar 2": 1}
+        assert library._search is None
+        library.remove_book("1000000005")
+        assert library.author_counts() == {"Yazar 0": 2, "Yazar 1": 2}
+        assert [book.isbn for book in library.search_books("kitap 4")] == ["1000000004"]
+        library.close()
+
+    def test_mutations_merge_with_snapshot(self):
+
+        Library(TEST_LIBRARY_FILE).add_books([Book("Kitap 1", "Yazar 1", "1111111111"),
+                                              Book("Kitap 3", "Yazar 3", "3333333333")])
+
+        library = LazyLibrary(TEST_LIBRARY_FILE, journal=True)
+        library.add_book(Book("Kitap 2", "Yazar 1", "2222222222"))
+        assert library.remove_book("3333333333")
+        with pytest.raises(ValueError):
+            library.add_book(Book("Kitap 1", "Yazar 1", "1111111111"))
+        assert [book.isbn for book in library.books] == ["1111111111", "2222222222"]
+        assert library.author_counts() == {"Yazar 1": 2}
+        assert [book.isbn for book in library.search_books("kitap 2")] == ["2222222222"]
+        library.close()
+
+        reloaded = LazyLibrary(TEST_LIBRARY_FILE, journal=True)
+        assert [book.isbn for book in reloaded.books] == ["1111111111", "2222222222"]
+        reloaded.compact()
+        reloaded.close()
+        assert [book.isbn for book in Library(TEST_LIBRARY_FILE).books] == ["1111111111", "2222222222"]
+
+    @pytest.mark.asyncio
+    async def test_flush_writes_snapshot_off_the_loop(self):
+
+        Library(TEST_LIBRARY_FILE).add_books([Book("Kitap 1", "Yazar 1", "1111111111"),
+                                              Book("Kitap 2", "Yazar 2", "2222222222")])
+        library = LazyLibrary(TEST_LIBRARY_FILE)
+        library.persistence = PersistenceWorker(library.prepare_flush, interval=60)
+        library.add_book(Book("Kitap 3", "Yazar 3", "3333333333"))
+        library.add_book(Book("Kitap 4", "Yazar 4", "4444444444"))
+        library.remove_book("1111111111")
+
+        job = library.prepare_flush()
+        library.remove_book("3333333333")
+        library.remove_book("2222222222")
+        library.add_book(Book("Kitap 5", "Yazar 5", "5555555555"))
+        finish = await asyncio.to_thread(job)
+        assert len(LazyLibrary(TEST_LIBRARY_FILE)) == 3
+        finish()
+
+        assert [book.isbn for book in library.books] == ["4444444444", "5555555555"]
+        assert len(library) == 2
+        assert list(library._books) == ["5555555555"]
+        await library.persistence.flush()
+        assert [book.isbn for book in LazyLibrary(TEST_LIBRARY_FILE).books] == ["4444444444", "5555555555"]
+        library.close()
+
+    def test_stale_index_is_rebuilt(self):
+
+        library = LazyLibrary(TEST_LIBRARY_FILE)
+        library.add_book(Book("Kitap 1", "Yazar 1", "1111111111"))
+        library.close()
+        Library(TEST_LIBRARY_FILE).add_book(Book("Kitap 2", "Yazar 2", "2222222222"))
+
+        reloaded = LazyLibrary(TEST_LIBRARY_FILE)
+        assert reloaded.find_book("2222222222").author == "Yazar 2"
+        assert len(reloaded) == 2
+        reloaded.close()
+
+    def test_unindexable_snapshot_is_rewritten(self):
+
+        with open(TEST_LIBRARY_FILE, "w", encoding="utf-8") as file:
+            json.dump([{"title": "Kitap 1", "author": "Yazar 1", "isbn": "1111111111"}], file)
+
+        library = LazyLibrary(TEST_LIBRARY_FILE)
+        assert library.find_book("1111111111").title == "Kitap 1"
+        library.close()
+        with open(TEST_LIBRARY_FILE, encoding="utf-8") as file:
+            assert file.read().startswith('[\n  {\n    "title"')
+
+
+class TestPersistenceWorker:
+
+    @pytest.mark.asyncio
+    async def test_mutations_flushed_in_batches(self):
+
+        library = Library(TEST_LIBRARY_FILE, journal=True)
+        worker = library.persistence = PersistenceWorker(library.prepare_flush, interval=60, max_pending=2)
+        worker.start()
+
+        library.add_book(Book("Kitap 1", "Yazar 1", "1111111111"))
+        await asyncio.sleep(0.05)
+        assert library.journal.entries == 0
+
+        library.add_book(Book("Kitap 2", "Yazar 2", "2222222222"))
+        library.add_book(Book("Kitap 3", "Yazar 3", "3333333333"))
+        await asyncio.sleep(0.05)
+        assert worker.flushes == 1
+        assert library.journal.entries == 3
+
+        library.remove_book("1111111111")
+        await worker.stop()
+        library.close()
+        assert [book.isbn for book in Library(TEST_LIBRARY_FILE, journal=True).books] == ["2222222222", "3333333333"]
+
+    @pytest.mark.asyncio
+    async def test_sync_durability_waits_for_flush(self):
+
+        library = Library(TEST_LIBRARY_FILE)
+        library.persistence = PersistenceWorker(library.prepare_flush, interval=0.01, durability="sync")
+        library.persistence.start()
+
+        library.add_book(Book("Kitap 1", "Yazar 1", "1111111111"))
+        assert not os.path.exists(TEST_LIBRARY_FILE)
+        await library.persisted()
+        assert len(Library(TEST_LIBRARY_FILE)) == 1
+        await library.persistence.stop()
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_is_retried(self):
+
+        library = Library(TEST_LIBRARY_FILE)
+        library.persistence = PersistenceWorker(library.prepare_flush, interval=0.01, durability="sync")
+        library.persistence.start()
+
+        library.add_book(Book("Kitap 1", "Yazar 1", "1111111111"))
+        with patch("storage._dump_snapshot", side_effect=OSError("disk dolu")):
+            with pytest.raises(OSError):
+                await library.persisted()
+        await asyncio.sleep(0.05)
+        await library.persistence.stop()
+        assert len(Library(TEST_LIBRARY_FILE)) == 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("library_class", [Library, LazyLibrary])
+    async def test_crash_before_journal_truncate(self, library_class):
+
+        library = library_class(TEST_LIBRARY_FILE, journal=True, compact_every=3)
+        library.persistence = PersistenceWorker(library.prepare_flush, interval=60)
+        library.add_book(Book("Kitap 1", "Yazar 1", "1111111111"))
+        await library.persistence.flush()
+
+        library.remove_book("1111111111")
+        library.add_book(Book("Kitap 2", "Yazar 2", "2222222222"))
+        with patch("storage.Journal.truncate", side_effect=OSError("süreç çöktü")):
+            await library.persistence.flush()
+        assert [book.isbn for book in Library(TEST_LIBRARY_FILE).books] == ["2222222222"]
+
+        reloaded = library_class(TEST_LIBRARY_FILE, journal=True)
+        assert [book.isbn for book in reloaded.books] == ["2222222222"]
+        reloaded.close()
+        library.close()
+
+
+class TestSharedLibrary:
+
+    def test_instances_see_each_others_writes(self):
+
+        first = Library(TEST_LIBRARY_FILE, journal=True, shared=True)
+        second = Library(TEST_LIBRARY_FILE, journal=True, shared=True)
+
+        first.add_book(Book("Kitap 1", "Yazar 1", "1111111111"))
+        with pytest.raises(ValueError):
+            second.add_book(Book("Kitap 1", "Yazar 1", "1111111111"))
+        second.add_book(Book("Kitap 2", "Yazar 1", "2222222222"))
+
+        first.refresh()
+        assert [book.isbn for book in first.page_books()] == ["1111111111", "2222222222"]
+        assert first.author_counts() == {"Yazar 1": 2}
+
+        second.compact()
+        assert first.remove_book("2222222222")
+        second.refresh()
+        assert [book.isbn for book in second.books] == ["1111111111"]
+        first.close()
+        second.close()
+
+    @pytest.mark.asyncio
+    async def test_refresh_waits_off_the_event_loop(self):
+
+        first = Library(TEST_LIBRARY_FILE, journal=True, shared=True)
+        second = Library(TEST_LIBRARY_FILE, journal=True, shared=True)
+        second.add_book(Book("Kitap 1", "Yazar 1", "1111111111"))
+        second.compact()
+
+        blocker = FileLock(TEST_LIBRARY_FILE + ".lock")
+        blocker.acquire(shared=False)
+        refresh = asyncio.ensure_future(first.refreshed())
+        await asyncio.sleep(0.05)
+        assert not refresh.done()
+        blocker.release()
+        blocker.close()
+        await refresh
+        assert [book.isbn for book in first.books] == ["1111111111"]
+
+        async with first.locked():
+            first.add_book(Book("Kitap 2", "Yazar 2", "2222222222"))
+        await second.refreshed()
+        assert [book.isbn for book in second.page_books()] == ["1111111111", "2222222222"]
+        first.close()
+        second.close()
+
+    @pytest.mark.asyncio
+    async def test_writes_run_off_the_event_loop(self):
+
+        library = Library(TEST_LIBRARY_FILE, journal=True, compact_every=2, shared=True)
+        calls = []
+
+        def record(name, func):
+            def call(*args, **kwargs):
+                calls.append((name, threading.get_ident()))
+                return func(*args, **kwargs)
+            return call
+
+        library.journal.append_many = record("append", library.journal.append_many)
+        with patch("api.write_snapshot", record("snapshot", write_snapshot)):
+            async with library.locked():
+                library.add_book(Book("Kitap 1", "Yazar 1", "1111111111"))
+            async with library.locked():
+                library.add_book(Book("Kitap 2", "Yazar 2", "2222222222"))
+
+        assert [name for name, _ in calls] == ["append", "append", "snapshot"]
+        assert threading.get_ident() not in {thread for _, thread in calls}
+        assert library.journal.entries == 0
+        library.close()
+        assert len(Library(TEST_LIBRARY_FILE, journal=True, shared=True)) == 2
+
+    def test_concurrent_processes_do_not_lose_writes(self):
+
+        context = multiprocessing.get_context("fork" if hasattr(os, "fork") else "spawn")
+        processes = [context.Process(target=add_books_in_process, args=(worker,)) for worker in range(1, 4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(30)
+            assert process.exitcode == 0
+
+        library = Library(TEST_LIBRARY_FILE, journal=True)
+        assert len(library) == 60
+        library.close()
+
+
+class TestMetadataCache:
+
+    @pytest.mark.asyncio
+    async def test_add_book_by_isbn_uses_cache(self):
+
+        calls = []
+        library = Library(TEST_LIBRARY_FILE, cache=MetadataCache(None))
+
+        with mock_openlibrary(openlibrary_handler(calls)):
+            book = await library.add_book_by_isbn("9780743273565")
+            assert book.author == "F. Scott Fitzgerald"
+            library.remove_book("9780743273565")
+            await library.add_book_by_isbn("9780743273565")
+
+            for _ in range(2):
+                with pytest.raises(ValueError):
+                    await library.add_book_by_isbn("9999999999")
+
+        assert calls == ["/isbn/9780743273565.json", "/authors/OL26783A.json", "/isbn/9999999999.json"]
+
+    @pytest.mark.asyncio
+    async def test_authors_resolved_concurrently(self):
+
+        in_flight = []
+        peak = []
+
+        async def handler(request):
+            if request.url.path.startswith("/isbn/"):
+                return httpx.Response(200, json={"title": "Good Omens", "authors": [
+                    {"key": "/authors/OL1A"}, {"key": "/authors/OL2A"}, {"key": "/authors/OL3A"}
+                ]})
+            in_flight.append(request.url.path)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.05)
+            in_flight.remove(request.url.path)
+            name = {"/authors/OL1A.json": "Terry Pratchett", "/authors/OL2A.json": "Neil Gaiman"}
+            if request.url.path in name:
+                return httpx.Response(200, json={"name": name[request.url.path]})
+            return httpx.Response(404)
+
+        library = Library(TEST_LIBRARY_FILE)
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http_client:
+            library.http_client = http_client
+            book = await library.add_book_by_isbn("9780060853983")
+
+        assert book.author == "Terry Pratchett, Neil Gaiman"
+        assert max(peak) == 3
+
+    @pytest.mark.asyncio
+    async def test_import_retries_transient_errors(self):
+
+        attempts = []
+
+        def handler(request):
+            attempts.append(request.url.path)
+            if len(attempts) == 1:
+                return httpx.Response(503)
+            return httpx.Response(200, json={"title": "Dune"})
+
+        library = Library(TEST_LIBRARY_FILE)
+        library.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        results = [result async for result in library.import_isbns(["9780441013593"], retries=1, backoff=0)]
+        await library.http_client.aclose()
+
+        assert results[0]["status"] == "ok"
+        assert results[-1]["summary"]["added"] == 1
+        assert len(attempts) == 2
+        assert library.find_book("9780441013593").author == "Bilinmeyen Yazar"
+
+    @pytest.mark.asyncio
+    async def test_concurrent_adds_share_one_lookup(self):
+
+        calls = []
+        sync_handler = openlibrary_handler(calls)
+
+        async def handler(request):
+            await asyncio.sleep(0.05)
+            return sync_handler(request)
+
+        library = Library(TEST_LIBRARY_FILE)
+        library.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        results = await asyncio.gather(
+            *(library.add_book_by_isbn("9780743273565") for _ in range(5)),
+            return_exceptions=True
+        )
+        await library.http_client.aclose()
+
+        assert calls == ["/isbn/9780743273565.json", "/authors/OL26783A.json"]
+        assert sum(isinstance(result, Book) for result in results) == 1
+        assert sum(isinstance(result, ValueError) for result in results) == 4
+        assert len(library._inflight) == 0
+
+    def test_ttl_and_lru_eviction(self):
+
+        cache = MetadataCache(None, max_entries=2, negative_ttl=0)
+        cache.set("a", 200, {"title": "A"})
+        cache.set("b", 200, {"title": "B"})
+        cache.get("a")
+        cache.set("c", 200, {"title": "C"})
+
+        assert cache.get("a") == (200, {"title": "A"})
+        assert cache.get("b") is None
+
+        cache.set("d", 404, None)
+        cache.set("e", 500, None)
+        assert cache.get("d") is None
+        assert cache.get("e") is None
+
+    def test_disk_persistence(self):
+
+        cache = MetadataCache(TEST_CACHE_FILE)
+        cache.set("a", 200, {"title": "A"})
+        cache.set("b", 404, None)
+        cache.close()
+
+        reopened = MetadataCache(TEST_CACHE_FILE)
+        assert reopened.get("a") == (200, {"title": "A"})
+        assert reopened.get("b") == (404, None)
+        reopened.close()
+
+
+class TestBackendCall:
+
+    @pytest.mark.asyncio
+    async def test_timeout_and_concurrency_cap(self):
+
+        running = []
+
+        async def backend(delay):
+            running.append(1)
+            peak = len(running)
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                running.pop()
+            return peak
+
+        call = BackendCall(backend, timeout=0.05, concurrency=2, failure_threshold=100)
+        with pytest.raises(asyncio.TimeoutError):
+            await call(1)
+        assert max(await asyncio.gather(*(call(0.01) for _ in range(6)))) == 2
+
+    @pytest.mark.asyncio
+    async def test_circuit_opens_and_recovers(self):
+
+        calls = []
+
+        async def backend(status_code):
+            calls.append(status_code)
+            return status_code
+
+        call = BackendCall(backend, failure_threshold=2, reset_timeout=0.05, is_failure=lambda result: result >= 500)
+        assert [await call(503), await call(503)] == [503, 503]
+        assert call.state == "open"
+        with pytest.raises(CircuitOpenError):
+            await call(200)
+        assert calls == [503, 503]
+
+        await asyncio.sleep(0.06)
+        assert call.state == "half-open"
+        assert await call(200) == 200
+        assert call.state == "closed"
+
+    @pytest.mark.asyncio
+    async def test_results_cached_by_arguments(self):
+
+        calls = []
+
+        async def backend(value, scale=1):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return value * scale
+
+        call = BackendCall(backend, cache_ttl=60)
+        assert await asyncio.gather(call(2), call(2), call(3, scale=2)) == [2, 2, 6]
+        assert await call(2) == 2
+        assert sorted(calls) == [2, 3]
+
+    @pytest.mark.asyncio
+    async def test_openlibrary_outage_opens_circuit(self):
+
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            return httpx.Response(503)
+
+        library = Library(TEST_LIBRARY_FILE)
+        library.upstream.failure_threshold = 2
+        library.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        for isbn in ("9780000000001", "9780000000002"):
+            with pytest.raises(ValueError):
+                await library.add_book_by_isbn(isbn)
+        with pytest.raises(CircuitOpenError):
+            await library.add_book_by_isbn("9780000000003")
+        assert len(calls) == 2
+
+        with patch('api.library', library):
+            response = client.post("/books", json={"isbn": "9780000000004"})
+        await library.http_client.aclose()
+
+        assert response.status_code == 503
+        assert int(response.headers["Retry-After"]) >= 1
+        assert "yanıt vermiyor" in response.json()["detail"]
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_openlibrary_timeout_is_gateway_timeout(self):
+
+        def handler(request):
+            raise httpx.ReadTimeout("zaman aşımı", request=request)
+
+        library = Library(TEST_LIBRARY_FILE)
+        library.http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        with patch('api.library', library):
+            response = client.post("/books", json={"isbn": "9780000000001"})
+        await library.http_client.aclose()
+
+        assert response.status_code == 504
+
+
+class TestMetrics:
+
+    def test_text_exposition(self):
+
+        registry = MetricsRegistry()
+        registry.counter("requests_total", "istekler", ("route",)).inc('/a"b')
+        registry.gauge("books", "kitaplar").set_function(lambda: 42)
+        latency = registry.histogram("latency_seconds", "süre", buckets=(0.1, 1))
+        for value in (0.05, 0.1, 0.5, 3):
+            latency.observe(value)
+
+        lines = registry.render().splitlines()
+        assert 'requests_total{route="/a\\"b"} 1' in lines
+        assert "books 42" in lines
+        assert "# TYPE latency_seconds histogram" in lines
+        assert 'latency_seconds_bucket{le="0.1"} 2' in lines
+        assert 'latency_seconds_bucket{le="1"} 3' in lines
+        assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+        assert "latency_seconds_count 4" in lines
+        assert registry.counter("requests_total", "istekler", ("route",)).value('/a"b') == 1
+        with pytest.raises(ValueError):
+            registry.gauge("requests_total", "istekler")
+
+    @pytest.mark.asyncio
+    async def test_backend_and_flush_observers(self):
+
+        async def backend(status_code):
+            return status_code
+
+        registry = MetricsRegistry()
+        call = BackendCall(backend, name="test", failure_threshold=1, is_failure=lambda result: result >= 500)
+        instrument_backend(registry, call)
+        assert await call(200) == 200
+        assert await call(503) == 503
+        with pytest.raises(CircuitOpenError):
+            await call(200)
+
+        calls = registry.get("backend_calls_total")
+        assert [calls.value("test", outcome) for outcome in ("ok", "failure", "rejected")] == [1, 1, 1]
+        assert registry.get("backend_call_duration_seconds").count("test") == 2
+        assert registry.get("backend_circuit_open").value("test") == 1
+
+        flushes = registry.counter("flushes_total", "yazmalar", ("outcome",))
+        durations = registry.histogram("flush_seconds", "yazma süresi")
+        library = Library(TEST_LIBRARY_FILE)
+        library.persistence = PersistenceWorker(library.prepare_flush, observer=timing_observer(durations, flushes))
+        library.add_book(Book("Kitap 1", "Yazar 1", "1111111111"))
+        await library.persistence.flush()
+        assert flushes.value("ok") == 1
+        assert durations.count() == 1
+
+    def test_metrics_endpoint(self):
+
+        client.get("/health")
+        client.get("/health")
+        client.get("/yok")
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        lines = response.text.splitlines()
+        assert any(line.startswith('http_requests_total{method="GET",route="/health",status="200"}') for line in lines)
+        assert any(line.startswith('http_requests_total{method="GET",route="unmatched",status="404"}') for line in lines)
+        assert any(line.startswith('http_request_duration_seconds_bucket{method="GET",route="/health",le="0.001"}')
+                   for line in lines)
+        assert 'http_requests_in_progress{method="GET"} 1' in lines
+        assert any(line.startswith("library_books ") for line in lines)
+
+
+class TestSQLiteLibrary:
+
+    def test_add_find_remove(self):
+
+        library = SQLiteLibrary(TEST_DB_FILE)
+        library.add_book(Book("Kitap 1", "Yazar 1", "1111111111"))
+        library.add_book(Book("Kitap 2", "Yazar 2", "2222222222"))
+
+        assert len(library) == 2
+        assert library.find_book("1111111111").title == "Kitap 1"
+        assert [book.isbn for book in library.list_books()] == ["1111111111", "2222222222"]
+
+        assert library.remove_book("1111111111") is True
+        assert library.remove_book("1111111111") is False
+        assert "1111111111" not in library
+        library.close()
+
+    def test_duplicate_isbn(self):
+
+        library = SQLiteLibrary(TEST_DB_FILE)
+        library.add_book(Book("Kitap 1", "Yazar 1", "1111111111"))
+
+        with pytest.raises(ValueError):
+            library.add_book(Book("Kitap 2", "Yazar 2", "1111111111"))
+        library.close()
+
+    def test_persists_and_imports(self):
+
+        json_library = Library(TEST_LIBRARY_FILE)
+        json_library.add_book(Book("Kitap 1", "Yazar 1", "1111111111"))
+        json_library.add_book(Book("Kitap 2", "Yazar 2", "2222222222"))
+
+        library = SQLiteLibrary(TEST_DB_FILE)
+        assert library.import_books(json_library.books) == 2
+        assert library.import_books(json_library.books) == 0
+        library.close()
+
+        reopened = SQLiteLibrary(TEST_DB_FILE)
+        assert len(reopened) == 2
+        reopened.close()
+
+    def test_author_counts(self):
+
+        library = SQLiteLibrary(TEST_DB_FILE)
+        library.add_book(Book("Kitap 1", "Yazar A", "1111111111"))
+        library.add_book(Book("Kitap 2", "Yazar A", "2222222222"))
+        library.add_book(Book("Kitap 3", "Yazar B", "3333333333"))
+        library.remove_book("3333333333")
+
+        assert library.author_counts() == {"Yazar A": 2}
+        library.close()
+
+    def test_search_books(self):
+
+        library = SQLiteLibrary(TEST_DB_FILE)
+        library.add_book(Book("İnce Memed", "Yaşar Kemal", "1111111111"))
+        library.add_book(Book("Kürk Mantolu Madonna", "Sabahattin Ali", "2222222222"))
+
+        assert [book.isbn for book in library.search_books("INCE mem")] == ["1111111111"]
+        assert [book.isbn for book in library.search_books("kürk sabah")] == ["2222222222"]
+        library.remove_book("1111111111")
+        assert library.search_books("ince") == []
+        library.close()
+
+    def test_search_index_keyed_by_rowid(self):
+
+        library = SQLiteLibrary(TEST_DB_FILE)
+        library.add_book(Book("İnce Memed", "Yaşar Kemal", "1111111111"))
+        library._conn.executescript(library.DROP_SEARCH + """
+            CREATE VIRTUAL TABLE books_fts USING fts5(isbn UNINDEXED, text);
+            INSERT INTO books_fts (isbn, text) VALUES ('1111111111', 'ince memed yaşar kemal');
+        """)
+        library.close()
+
+        library = SQLiteLibrary(TEST_DB_FILE)
+        library.add_book(Book("Kürk Mantolu Madonna", "Sabahattin Ali", "2222222222"))
+        assert [book.isbn for book in library.search_books("ince")] == ["1111111111"]
+        assert library._conn.execute("SELECT group_concat(rowid) FROM books_fts").fetchone()[0] == \
+            library._conn.execute("SELECT group_concat(id) FROM books").fetchone()[0]
+        library.remove_book("1111111111")
+        assert library.search_books("ince") == []
+        library.close()
+
+    def test_page_books(self):
+
+        library = SQLiteLibrary(TEST_DB_FILE)
+        for isbn in ["3333333333", "1111111111", "2222222222"]:
+            library.add_book(Book("Kitap", "Yazar", isbn))
+
+        assert [book.isbn for book in library.page_books(None, 2)] == ["1111111111", "2222222222"]
+        assert [book.isbn for book in library.page_books("2222222222", 2)] == ["3333333333"]
+        assert [book.isbn for book in library.iter_books(batch_size=1)] == ["1111111111", "2222222222", "3333333333"]
+        library.close()
+
 
 class TestBookClass:
     
@@ -279,6 +1278,12 @@ class TestBookClass:
         expected = "Test Kitap by Test Yazar (ISBN: 1234567890)"
         assert str(book) == expected
 
+    def test_book_is_slotted(self):
+
+        book = Book("Test Kitap", "Test" + " Yazar", "1234567890")
+        assert not hasattr(book, "__dict__")
+        assert book.author is Book("Diğer", "Test Yazar", "0987654321").author
+
     def test_book_to_dict(self):
        
         book = Book("Test Kitap", "Test Yazar", "1234567890")
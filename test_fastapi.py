@@ -0,0 +1,189 @@
+import asyncio
+import os
+import time
+
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi.testclient import TestClient
+from limits import parse
+from limits.strategies import FixedWindowRateLimiter
+
+os.environ.setdefault("RATE_LIMIT_STORAGE", "sqlite://")
+os.environ.setdefault("NOTIFICATION_LOG", "test_log.txt")
+
+import FastAPI
+from book_store import BookStore
+from notifications import NotificationSink
+from rate_limit_storage import SQLiteRateLimitStorage
+
+
+TEST_RATE_LIMIT_FILE = "test_ratelimits.db"
+TEST_LOG_FILE = "test_log.txt"
+TEST_FILES = [TEST_RATE_LIMIT_FILE + suffix for suffix in ("", "-wal", "-shm")] + \
+             [TEST_LOG_FILE + suffix for suffix in ("", ".1", ".2", ".lock")]
+
+
+@pytest.fixture(autouse=True)
+def setup_and_teardown():
+    FastAPI.limiter.reset()
+    yield
+    for path in TEST_FILES:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class TestRateLimitStorage:
+
+    def test_limit_is_shared_between_instances(self):
+
+        first = SQLiteRateLimitStorage(f"sqlite:///{TEST_RATE_LIMIT_FILE}")
+        second = SQLiteRateLimitStorage(f"sqlite:///{TEST_RATE_LIMIT_FILE}")
+        limit = parse("3/minute")
+
+        hits = [FixedWindowRateLimiter(storage).hit(limit, "127.0.0.1") for storage in (first, second, first, second)]
+        assert hits == [True, True, True, False]
+        assert second.get_expiry(limit.key_for("127.0.0.1")) > time.time()
+        first.close()
+        second.close()
+
+    def test_expired_counters_are_swept(self):
+
+        storage = SQLiteRateLimitStorage("sqlite://", sweep_interval=0)
+        storage.incr("expired", expiry=-1)
+        assert storage.get("expired") == 0
+        assert storage.incr("fresh", expiry=60) == 1
+        assert storage._conn.execute("SELECT key FROM counters").fetchall() == [("fresh",)]
+        storage.close()
+
+
+class TestRateLimitedEndpoints:
+
+    def test_limited_endpoint_rejects_after_quota(self):
+
+        with TestClient(FastAPI.app) as client:
+            statuses = [client.get("/limited-strict").status_code for _ in range(3)]
+        assert statuses == [200, 200, 429]
+
+
+class TestNotificationSink:
+
+    @pytest.mark.asyncio
+    async def test_batches_rotates_and_drains(self):
+
+        sink = NotificationSink(TEST_LOG_FILE, max_batch=100, flush_interval=60, max_bytes=5000, backup_count=2)
+        sink.start()
+        for i in range(250):
+            await sink.submit(f"okur{i}@example.com", "yeni kitap")
+        await asyncio.sleep(0.05)
+        assert sink.written == 200
+
+        await sink.stop()
+        assert sink.written == 250
+        lines = []
+        for path in (TEST_LOG_FILE + ".2", TEST_LOG_FILE + ".1", TEST_LOG_FILE):
+            with open(path, encoding="utf-8") as file:
+                lines.extend(file.read().splitlines())
+        assert lines[-1] == "bildirim okur249@example.com: yeni kitap"
+        assert not os.path.exists(TEST_LOG_FILE + ".3")
+        assert len(lines) == 250
+
+    def test_endpoint_flushes_on_shutdown(self):
+
+        with TestClient(FastAPI.app) as client:
+            for i in range(3):
+                assert client.post(f"/send-notification/okur{i}@example.com").status_code == 200
+
+        with open(TEST_LOG_FILE, encoding="utf-8") as file:
+            assert file.read().splitlines() == [f"bildirim okur{i}@example.com: kitap bildiimi" for i in range(3)]
+
+
+class TestBookStore:
+
+    def test_crud_and_ordered_slices(self):
+
+        store = BookStore({"id": book_id, "title": f"Kitap {book_id}"} for book_id in range(1, 11))
+        assert store.remove(4)["id"] == 4
+        assert store.remove(4) is None
+        store.replace(5, {"id": 5, "title": "Yeni"})
+        store.add({"id": 20, "title": "Kitap 20"})
+
+        assert len(store) == 10
+        assert 4 not in store
+        assert store.get(5)["title"] == "Yeni"
+        assert [book["id"] for book in store.slice(2, 3)] == [3, 5, 6]
+        assert [book["id"] for book in store.slice(8, 10)] == [10, 20]
+        assert store.slice(10, 5) == []
+        with pytest.raises(ValueError):
+            store.add({"id": 15})
+
+
+class TestBookEndpoints:
+
+    def test_crud_endpoints(self):
+
+        with TestClient(FastAPI.app) as client:
+            created = client.post("/books/", json={"title": "Tutunamayanlar", "author": "Oğuz Atay"}).json()
+            assert client.delete("/books/2").status_code == 204
+            assert client.get("/books/2").status_code == 404
+            assert [book["id"] for book in client.get("/books/?skip=1&limit=2").json()] == [3, created["id"]]
+            assert client.put(f"/books/{created['id']}", json={"title": "Korkuyu Beklerken", "author": "Oğuz Atay"}).status_code == 200
+            assert client.get(f"/books/{created['id']}").json()["title"] == "Korkuyu Beklerken"
+
+    def test_conditional_get_and_update(self):
+
+        with TestClient(FastAPI.app) as client:
+            etag = client.get("/books/1").headers["ETag"]
+            assert client.get("/books/1", headers={"If-None-Match": etag}).status_code == 304
+
+            update = {"title": "The Hobbit", "author": "Tolkien", "publication_year": 1937}
+            response = client.put("/books/1", json=update, headers={"If-Match": etag})
+            assert response.status_code == 200
+            assert response.headers["ETag"] != etag
+
+            stale = client.put("/books/1", json=update, headers={"If-Match": etag})
+            assert stale.status_code == 412
+            assert stale.headers["ETag"] == response.headers["ETag"]
+            assert client.put("/books/1?version=1", json=update).status_code == 412
+            assert client.put("/books/1?version=2", json=update).status_code == 200
+            assert client.get("/books/1", headers={"If-None-Match": etag}).status_code == 200
+
+    def test_list_endpoints_are_cached(self):
+
+        with TestClient(FastAPI.app) as client:
+            response = client.get("/api/v1/books")
+            etag = response.headers["ETag"]
+            assert [book["id"] for book in response.json()] == [1, 2, 3]
+            assert client.get("/api/v1/books", headers={"If-None-Match": etag}).status_code == 304
+            assert client.get("/secure/books", headers={"X-API-Key": FastAPI.API_KEY, "If-None-Match": etag}).status_code == 304
+            assert client.get("/secure/books", headers={"If-None-Match": etag}).status_code == 403
+
+            client.delete("/books/2")
+            response = client.get("/api/v1/books", headers={"If-None-Match": etag})
+            assert [book["id"] for book in response.json()] == [1, 3]
+            assert client.get("/api/v2/books").json()["total_books"] == 2
+
+    def test_slow_endpoint_is_cached(self):
+
+        FastAPI.slow_backend._cache.clear()
+        with TestClient(FastAPI.app) as client:
+            with patch("FastAPI.slow_backend.func", AsyncMock(return_value={"status": "done"})) as backend:
+                assert client.get("/slow-endpoint").json() == {"status": "done"}
+                assert client.get("/slow-endpoint").json() == {"status": "done"}
+        assert backend.await_count == 1
+
+
+class TestMetricsEndpoint:
+
+    def test_routes_and_catalogue_size(self):
+
+        with TestClient(FastAPI.app) as client:
+            before = FastAPI.metrics.get("http_requests_total").value("GET", "/books/{book_id}", "404")
+            client.get("/books/1")
+            client.get("/books/99")
+            client.post("/books/", json={"title": "Tutunamayanlar", "author": "Oğuz Atay"})
+            lines = client.get("/metrics").text.splitlines()
+
+        assert FastAPI.metrics.get("http_requests_total").value("GET", "/books/{book_id}", "404") == before + 1
+        assert any(line.startswith('http_requests_total{method="POST",route="/books/",status="201"}') for line in lines)
+        assert "library_books 4" in lines
+        assert 'backend_circuit_open{backend="slow_db"} 0' in lines